@@ -0,0 +1,48 @@
+"""
+Benchmark: AttendanceService.extract_time_ranges (columnar classifier, slot
+cache cleared before each run) on a month of data, against the previous
+per-group process_group implementation.
+
+    python bench/bench_classifier.py [n_days]
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import make_pivot, reference_time_ranges, reset_divisions  # noqa: E402
+from web_app import AppConstants, AttendanceRepository, AttendanceSchema, AttendanceService  # noqa: E402
+
+from bench_metrics import best_of  # noqa: E402
+
+
+def main() -> None:
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 31
+    names = reset_divisions()
+    flat = AttendanceRepository('bench://attendance').transform(make_pivot(names, n_days))
+    expanded = AttendanceSchema.expand(flat, ['Tanggal'])
+    service = AttendanceService(None, None)
+
+    def columnar():
+        service.data_service.slot_cache.clear()
+        return service.extract_time_ranges(flat)
+
+    t_reference, expected = best_of(1, reference_time_ranges, expanded)
+    t_columnar, result = best_of(3, columnar)
+    key = [AppConstants.COL_EMPLOYEE_NAME, 'Tanggal']
+    pd.testing.assert_frame_equal(
+        result.astype({key[0]: object}).sort_values(key).reset_index(drop=True),
+        expected.astype({key[0]: object}).sort_values(key).reset_index(drop=True)[result.columns],
+        check_dtype=False,
+    )
+
+    print(f"{len(names)} employees x {n_days} days -> {len(result):,} person-days, {len(flat):,} punches")
+    print(f"  process_group: {t_reference * 1000:8.1f} ms")
+    print(f"  columnar:      {t_columnar * 1000:8.1f} ms  ({t_reference / t_columnar:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark: AttendanceService.calculate_metrics at 10k employees, against the
+previous iterrows implementation.
+
+    python bench/bench_metrics.py [n_employees]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import REPORT_DATE, make_report, reference_metrics, reset_divisions  # noqa: E402
+from web_app import AttendanceService  # noqa: E402
+
+
+def best_of(runs: int, func, *args):
+    best, result = float('inf'), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    n_employees = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    reset_divisions()
+    service = AttendanceService(None, None)
+    df, statuses = make_report(n_employees, seed=0)
+    annotated = service.annotate_report(df, statuses, REPORT_DATE)
+
+    t_reference, expected = best_of(3, reference_metrics, annotated, statuses)
+    t_masks, metrics = best_of(3, service.calculate_metrics, annotated, statuses)
+    assert metrics == expected, "calculate_metrics differs from the iterrows reference"
+
+    print(f"{n_employees} employees, {len(statuses)} manual statuses")
+    print(f"  iterrows: {t_reference * 1000:8.1f} ms")
+    print(f"  masks:    {t_masks * 1000:8.1f} ms  ({t_reference / t_masks:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
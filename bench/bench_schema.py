@@ -0,0 +1,54 @@
+"""
+Benchmark: deep memory of the flat attendance table, compact AttendanceSchema
+layout against the previous object-column layout (Person Name strings, Tanggal
+dates, Waktu times, Jam / Menit ints, Hari strings), on a synthetic pivot.
+
+    python bench/bench_schema.py [n_days]
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import make_pivot, reset_divisions  # noqa: E402
+from web_app import AppConstants, AttendanceRepository, AttendanceSchema, PerformanceMonitor  # noqa: E402
+
+
+def legacy_layout(flat: pd.DataFrame) -> pd.DataFrame:
+    """The flat frame as transform() used to return it."""
+    event_time = flat[AppConstants.COL_EVENT_TIME]
+    return pd.DataFrame({
+        AppConstants.COL_PERSON_NAME: flat[AppConstants.COL_PERSON_NAME].astype(object),
+        AppConstants.COL_EVENT_TIME: event_time,
+        'Tanggal': event_time.dt.date,
+        'Waktu': event_time.dt.time,
+        'Jam': event_time.dt.hour,
+        'Menit': event_time.dt.minute,
+        'Hari': event_time.dt.day_name(),
+    })
+
+
+def main() -> None:
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    names = reset_divisions()
+    pivot = make_pivot(names, n_days)
+    flat = AttendanceRepository('bench://attendance').transform(pivot)
+
+    compact_bytes = PerformanceMonitor.memory_usage(flat)
+    legacy = legacy_layout(flat)
+    legacy_bytes = PerformanceMonitor.memory_usage(legacy)
+    # Kolom turunan dari expand() harus sama dengan layout lama
+    expanded = AttendanceSchema.expand(flat, ['Tanggal', 'Waktu', 'Hari'])
+    assert expanded['Tanggal'].tolist() == legacy['Tanggal'].tolist()
+
+    print(f"{len(names)} employees x {n_days} days -> {len(flat):,} punches")
+    print(f"  pivot frame:    {PerformanceMonitor.memory_usage(pivot) / 2**20:8.1f} MB")
+    print(f"  legacy layout:  {legacy_bytes / 2**20:8.1f} MB")
+    print(f"  compact layout: {compact_bytes / 2**20:8.1f} MB  ({legacy_bytes / compact_bytes:.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
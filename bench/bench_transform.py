@@ -0,0 +1,43 @@
+"""
+Benchmark: AttendanceRepository.transform on a 1k-employee x 365-day pivot,
+against the previous iterrows punch explosion.
+
+    python bench/bench_transform.py [n_employees] [n_days]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import make_pivot, reference_punches, reset_divisions  # noqa: E402
+from web_app import AppConstants, AttendanceRepository  # noqa: E402
+
+from bench_metrics import best_of  # noqa: E402
+
+
+def punch_pairs(df) -> list:
+    """(name, event time) pairs in a fixed order, to compare the two layouts."""
+    return sorted(zip(df[AppConstants.COL_PERSON_NAME].astype(str), df[AppConstants.COL_EVENT_TIME]))
+
+
+def main() -> None:
+    n_employees = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    roster = reset_divisions()
+    # Nama di luar registry dibuang transform, jadi baris diisi ulang dari roster
+    names = [roster[i % len(roster)] for i in range(n_employees)]
+    pivot = make_pivot(names, n_days)
+    repo = AttendanceRepository('bench://attendance')
+
+    t_reference, expected = best_of(1, reference_punches, pivot)
+    t_vectorized, flat = best_of(3, repo.transform, pivot)
+    assert punch_pairs(flat) == punch_pairs(expected), "transform differs from the iterrows reference"
+
+    print(f"{n_employees} employees x {n_days} days -> {len(flat):,} punches")
+    print(f"  iterrows:   {t_reference:8.2f} s")
+    print(f"  vectorized: {t_vectorized:8.2f} s  ({t_reference / t_vectorized:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
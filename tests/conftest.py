@@ -0,0 +1,27 @@
+"""
+Fixtures shared across test modules: a SharedDataService over in-memory
+sheet sources and the AttendanceService reading from it.
+"""
+
+import pytest
+
+from web_app import AttendanceRepository, AttendanceService, SharedDataService, StatusRepository
+
+from .helpers import PIVOT, STATUS, MemorySource, reset_divisions
+
+
+@pytest.fixture
+def data_service():
+    reset_divisions()
+    attendance = AttendanceRepository('memory://attendance')
+    attendance.source = MemorySource(PIVOT)
+    status = StatusRepository('memory://status')
+    status.source = MemorySource(STATUS)
+    service = SharedDataService(attendance, status)
+    yield service
+    service.stop()
+
+
+@pytest.fixture
+def attendance_service(data_service):
+    return AttendanceService(data_service.attendance_repo, data_service.status_repo, data_service)
@@ -0,0 +1,238 @@
+"""
+Shared test and benchmark helpers: reference implementations kept for
+regression checks, synthetic report frames and in-memory sheet sources.
+"""
+
+import hashlib
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import web_app
+from web_app import AppConstants, DivisionRegistry
+
+REPORT_DATE = date(2025, 1, 6)
+SLOTS = ('Pagi', 'Siang_1', 'Siang_2', 'Sore')
+
+PIVOT = (
+    "Nama,2025-01-01,2025-01-02,2025-01-03\n"
+    "Patra Anggana,07:30,07:31,07:32\n"
+    "Su Adam,08:00,,08:05\n"
+)
+STATUS = "Nama Karyawan,Tanggal,Keterangan\nBudiono,2025-01-02,SAKIT\n"
+
+
+class MemorySource:
+    """Stands in for ConditionalCsvSource: hash of body, body on demand; fetch() raises while failing is set."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.meta = {}
+        self.failing = False
+
+    def fetch(self) -> str:
+        if self.failing:
+            raise OSError("connection reset")
+        return hashlib.sha256(self.text.encode()).hexdigest()
+
+    def read_body(self) -> bytes:
+        return self.text.encode()
+
+
+def reference_metrics(df: pd.DataFrame, status_dict: Dict[str, str]) -> Dict[str, Any]:
+    """calculate_metrics as it was before the mask rewrite (iterrows + is_late per row)."""
+    total_employees = len(df)
+    present_count = 0; permit_count = 0; absent_count = 0; late_count = 0
+    late_list = []; permit_list = []; absent_list = []; partial_list = []
+
+    for idx, row in df.iterrows():
+        name = row[AppConstants.COL_EMPLOYEE_NAME]
+        times = [row.get('Pagi', ''), row.get('Siang_1', ''),
+                 row.get('Siang_2', ''), row.get('Sore', '')]
+        empty_count = sum(1 for t in times if t == '')
+        manual_status = status_dict.get(name, "")
+
+        if manual_status:
+            permit_count += 1
+            permit_list.append((name, manual_status))
+        elif empty_count == 4:
+            absent_count += 1
+            absent_list.append(name)
+        else:
+            present_count += 1
+            morning_time = row.get('Pagi', '')
+
+            if morning_time:
+                evening_time = row.get('Sore', '')
+                is_late_status, _ = reference_is_late(morning_time, name, evening_time)
+
+                if is_late_status:
+                    late_count += 1
+                    late_list.append((name, morning_time))
+
+            if empty_count > 0:
+                partial_list.append((name, empty_count))
+
+    return {
+        'total': total_employees, 'present': present_count, 'permit': permit_count,
+        'absent': absent_count, 'late': late_count, 'late_list': late_list,
+        'permit_list': permit_list, 'absent_list': absent_list, 'partial_list': partial_list,
+        'attendance_rate': (present_count / total_employees * 100) if total_employees > 0 else 0,
+        'punctuality_rate': ((present_count - late_count) / present_count * 100) if present_count > 0 else 0
+    }
+
+
+def reset_divisions() -> List[str]:
+    """Fresh DivisionRegistry (register() refuses duplicates), returns the roster."""
+    DivisionRegistry._divisions = {}
+    DivisionRegistry._member_index = {}
+    DivisionRegistry._ordered_members = None
+    DivisionRegistry._attribute_maps = {}
+    web_app.initialize_divisions()
+    return DivisionRegistry.get_all_members()
+
+
+def make_report(n_employees: int, seed: int = 0, names: Optional[List[str]] = None):
+    """Random daily report frame plus a manual status dict for ~8% of employees."""
+    rng = random.Random(seed)
+    names = names or [f"Karyawan {i}" for i in range(n_employees)]
+
+    def punch() -> str:
+        if rng.random() < 0.3:
+            return ''
+        return f"{rng.randint(6, 20):02d}:{rng.randint(0, 59):02d}"
+
+    df = pd.DataFrame({AppConstants.COL_EMPLOYEE_NAME: names, 'Tanggal': REPORT_DATE.isoformat()})
+    for slot in SLOTS:
+        df[slot] = [punch() for _ in names]
+    statuses = {name: rng.choice(['SAKIT', 'CUTI', 'DINAS']) for name in rng.sample(names, len(names) // 12)}
+    return df, statuses
+
+
+def make_pivot(names, n_days: int, seed: int = 0, start: date = date(2020, 1, 1)) -> pd.DataFrame:
+    """Random attendance pivot: one row per name, one column per day, 1-6 punches per cell."""
+    rng = random.Random(seed)
+
+    def cell():
+        if rng.random() < 0.1:
+            return None
+        return ",".join(f"{rng.randint(6, 20):02d}:{rng.randint(0, 59):02d}" for _ in range(rng.randint(1, 6)))
+
+    columns = {AppConstants.COL_PERSON_NAME: names}
+    for offset in range(n_days):
+        columns[(start + timedelta(days=offset)).isoformat()] = [cell() for _ in names]
+    return pd.DataFrame(columns)
+
+
+def reference_punches(df: pd.DataFrame) -> pd.DataFrame:
+    """Punch explosion of AttendanceRepository.transform as it was before vectorizing (iterrows)."""
+    df = df[df[AppConstants.COL_PERSON_NAME].isin(DivisionRegistry.get_all_members())]
+    date_columns = [col for col in df.columns if col != AppConstants.COL_PERSON_NAME]
+    df_melted = pd.melt(
+        df, id_vars=[AppConstants.COL_PERSON_NAME], value_vars=date_columns,
+        var_name='Tanggal_Absen', value_name='Jam_Raw'
+    )
+    df_melted = df_melted.dropna(subset=['Jam_Raw'])
+    df_melted = df_melted[df_melted['Jam_Raw'].astype(str).str.strip() != '']
+    df_melted = df_melted[~df_melted['Jam_Raw'].astype(str).str.contains(r'^[-,\s]+$')]
+
+    expanded_data = []
+    for _, row in df_melted.iterrows():
+        raw_text = str(row['Jam_Raw']).replace('\n', ',').replace('\r', ',')
+        for punch in raw_text.split(','):
+            punch = punch.strip()
+            if punch and punch != '-' and punch != '-,-':
+                expanded_data.append({
+                    AppConstants.COL_PERSON_NAME: row[AppConstants.COL_PERSON_NAME],
+                    AppConstants.COL_EVENT_TIME: f"{row['Tanggal_Absen']} {punch}:00"
+                })
+
+    new_df = pd.DataFrame(expanded_data, columns=[AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME])
+    new_df[AppConstants.COL_EVENT_TIME] = pd.to_datetime(new_df[AppConstants.COL_EVENT_TIME], errors='coerce')
+    return new_df.dropna(subset=[AppConstants.COL_EVENT_TIME])
+
+
+def reference_time_ranges(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    extract_time_ranges as it was before the columnar classifier: one
+    process_group call per (person, date). df needs Person Name, Event Time
+    and Tanggal (AttendanceSchema.expand).
+    """
+    df_clean = df.dropna(subset=[AppConstants.COL_PERSON_NAME, 'Tanggal']).copy()
+    df_clean[AppConstants.COL_PERSON_NAME] = df_clean[AppConstants.COL_PERSON_NAME].astype(object)
+    df_clean['Waktu_Obj'] = pd.to_datetime(df_clean[AppConstants.COL_EVENT_TIME]).dt.time
+
+    def process_group(group):
+        result = {'Pagi': '', 'Siang_1': '', 'Siang_2': '', 'Sore': ''}
+        sorted_group = group.sort_values(AppConstants.COL_EVENT_TIME)
+        first_log = sorted_group.iloc[0]['Waktu_Obj']
+        last_log = sorted_group.iloc[-1]['Waktu_Obj']
+        is_friday = sorted_group.iloc[0]['Tanggal'].weekday() == 4
+
+        is_shift_2 = last_log > time(19, 0, 0) or time(9, 0, 0) <= first_log <= time(11, 0, 0)
+        limit_pagi_end = time(11, 0, 0)
+        if not is_shift_2:
+            limit_siang_out_start, limit_siang_out_end = time(11, 30, 0), time(12, 59, 59)
+            limit_siang_in_start, limit_siang_in_end = time(13, 0, 0), time(14, 0, 0)
+            start_sore = time(17, 0, 0)
+        else:
+            if is_friday:
+                limit_siang_out_start, limit_siang_out_end = time(11, 30, 0), time(12, 59, 59)
+                limit_siang_in_start, limit_siang_in_end = time(13, 0, 0), time(14, 0, 0)
+            else:
+                limit_siang_out_start, limit_siang_out_end = time(13, 30, 0), time(14, 59, 59)
+                limit_siang_in_start, limit_siang_in_end = time(15, 0, 0), time(16, 0, 0)
+            start_sore = time(19, 0, 0)
+
+        for _, row in sorted_group.iterrows():
+            t = row['Waktu_Obj']
+            val_str = row[AppConstants.COL_EVENT_TIME].strftime(AppConstants.TIME_FORMAT)
+            if t < limit_pagi_end:
+                if result['Pagi'] == '': result['Pagi'] = val_str
+            elif limit_siang_out_start <= t <= limit_siang_out_end:
+                if result['Siang_1'] == '': result['Siang_1'] = val_str
+            elif limit_siang_in_start <= t <= limit_siang_in_end:
+                if result['Siang_2'] == '': result['Siang_2'] = val_str
+            elif t >= start_sore:
+                result['Sore'] = val_str
+            if t == last_log and t >= time(16, 0, 0) and result['Sore'] == '':
+                result['Sore'] = val_str
+        return pd.Series(result)
+
+    grouped = df_clean.groupby([AppConstants.COL_PERSON_NAME, 'Tanggal'])[
+        [AppConstants.COL_EVENT_TIME, 'Tanggal', 'Waktu_Obj']
+    ]
+    result_df = grouped.apply(process_group).reset_index()
+    return result_df.rename(columns={AppConstants.COL_PERSON_NAME: AppConstants.COL_EMPLOYEE_NAME})
+
+
+def reference_is_late(time_str: Optional[str], employee_name: str = "", evening_str: Optional[str] = None) -> Tuple[bool, str]:
+    """TimeService.is_late as it was before is_late_bulk (no break_out argument)."""
+    if not time_str:
+        return False, ""
+    try:
+        check_time = datetime.strptime(time_str, AppConstants.TIME_FORMAT).time()
+    except (ValueError, TypeError):
+        return False, ""
+
+    detected_shift = "UNKNOWN"
+    if evening_str:
+        try:
+            evening_time = datetime.strptime(evening_str, AppConstants.TIME_FORMAT).time()
+            detected_shift = "SHIFT 2" if evening_time > time(18, 0, 0) else "SHIFT 1"
+        except ValueError:
+            pass
+    if detected_shift == "UNKNOWN":
+        division_config = DivisionRegistry.find_by_member(employee_name)
+        if division_config and division_config.name in getattr(AppConstants, 'SHIFT_2_DIVISIONS', []):
+            detected_shift = "SHIFT 2"
+        elif check_time <= AppConstants.SHIFT_CUTOFF:
+            detected_shift = "SHIFT 1"
+        else:
+            detected_shift = "SHIFT 2"
+
+    if detected_shift == "SHIFT 2":
+        return check_time > AppConstants.S2_LATE_TOLERANCE, "SHIFT 2"
+    return check_time > AppConstants.S1_LATE_TOLERANCE, "SHIFT 1"
@@ -0,0 +1,48 @@
+"""
+AttendanceRepository.transform unpivots the sheet in blocks of
+INGEST_COLUMN_BLOCK date columns; any block size must give the same frame
+as one block over the whole sheet.
+"""
+
+import pandas as pd
+import pytest
+
+from web_app import AppConstants, AttendanceRepository
+
+from .helpers import make_pivot, reset_divisions
+
+N_DAYS = 23
+
+
+@pytest.fixture(scope="module")
+def pivot() -> pd.DataFrame:
+    names = reset_divisions()
+    df = make_pivot(names, N_DAYS, seed=5)
+    date_columns = df.columns[1:]
+    # Blok tengah & ekor tanpa punch sama sekali, plus sel '-' / CRLF / jam rusak
+    df[date_columns[8:11]] = None
+    df[date_columns[-4:]] = "-"
+    df.iloc[0, 1] = "07:01\r\n12:03,-, 13:00"
+    df.iloc[1, 2] = "25:99,08:00"
+    return df
+
+
+def transform(pivot: pd.DataFrame, block_size: int, monkeypatch) -> pd.DataFrame:
+    monkeypatch.setattr(AppConstants, 'INGEST_COLUMN_BLOCK', block_size)
+    return AttendanceRepository('memory://attendance').transform(pivot)
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 4, 7, 10, N_DAYS - 1])
+def test_blocks_match_whole_sheet(pivot, block_size, monkeypatch):
+    whole = transform(pivot, N_DAYS, monkeypatch)
+    assert len(whole) > 1000
+
+    pd.testing.assert_frame_equal(transform(pivot, block_size, monkeypatch), whole)
+
+
+def test_sheet_with_only_empty_blocks(pivot, monkeypatch):
+    empty = pivot.iloc[:, :1].assign(**{col: None for col in pivot.columns[9:12]})
+
+    whole = transform(empty, N_DAYS, monkeypatch)
+    assert whole.empty
+    pd.testing.assert_frame_equal(transform(empty, 2, monkeypatch), whole)
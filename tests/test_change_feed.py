@@ -0,0 +1,105 @@
+"""
+SharedDataService change feed over real repositories (incremental ingest),
+fed from in-memory sources instead of HTTP.
+"""
+
+import io
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from web_app import AttendanceRepository
+
+from .helpers import PIVOT, STATUS, MemorySource, make_pivot, reset_divisions
+
+
+def test_first_load_is_full_reload(data_service):
+    assert data_service.refresh().version == 1
+    assert data_service.changes_since(0) is None
+    assert data_service.changes_since(1) == frozenset()
+
+
+def test_attendance_edit_publishes_changed_keys(data_service):
+    data_service.refresh()
+    data_service.attendance_repo.source.text = PIVOT.replace("Su Adam,08:00,,", "Su Adam,08:00,08:10,")
+
+    assert data_service.refresh().version == 2
+    assert data_service.changes_since(1) == {('Su Adam', date(2025, 1, 2))}
+
+
+def test_status_only_refresh_does_not_repeat_attendance_changes(data_service):
+    data_service.refresh()
+    data_service.attendance_repo.source.text = PIVOT.replace("07:31", "07:41")
+    data_service.refresh()
+    data_service.status_repo.source.text = STATUS + "Su Adam,2025-01-03,CUTI\n"
+
+    assert data_service.refresh().version == 3
+    assert data_service.changes_since(2) == frozenset()
+    assert data_service.changes_since(1) == {('Patra Anggana', date(2025, 1, 2))}
+
+
+def test_range_version_follows_changes_in_range(data_service):
+    data_service.refresh()                                              # v1: full reload
+    data_service.attendance_repo.source.text = PIVOT.replace("07:32", "07:42")
+    data_service.refresh()                                              # v2: 2025-01-03
+    data_service.status_repo.source.text = STATUS + "Su Adam,2025-01-03,CUTI\n"
+    data_service.refresh()                                              # v3: status only
+
+    assert data_service.range_version(date(2025, 1, 1), date(2025, 1, 2), as_of=3) == 1
+    assert data_service.range_version(date(2025, 1, 2), date(2025, 1, 3), as_of=3) == 2
+    assert data_service.range_version(date(2025, 1, 3), date(2025, 1, 3), as_of=1) == 1
+    assert data_service.range_version(date(2025, 1, 1), date(2025, 1, 3), as_of=0) == 0
+
+
+def ingest_both(before: str, after: str):
+    """(incremental frame after before -> after, full ingest of after, last_changes of the incremental run)."""
+    incremental = AttendanceRepository('memory://attendance')
+    incremental.source = MemorySource(before)
+    incremental.fetch()
+    incremental.source.text = after
+    frame = incremental.fetch()
+
+    full = AttendanceRepository('memory://attendance')
+    full.source = MemorySource(after)
+    return frame, full.fetch(), incremental.last_changes
+
+
+@pytest.fixture(scope="module")
+def pivot_csv() -> str:
+    return make_pivot(reset_divisions(), 20, seed=3, start=date(2025, 1, 1)).to_csv(index=False)
+
+
+@pytest.mark.parametrize("edit", ["cell", "row", "add_column", "drop_column"])
+def test_incremental_ingest_matches_full_ingest(pivot_csv, edit):
+    pivot = pd.read_csv(io.StringIO(pivot_csv))
+    if edit == "cell":
+        pivot.loc[3, '2025-01-07'] = "06:59,12:30,19:45"
+        pivot.loc[10, '2025-01-15'] = None
+    elif edit == "row":
+        pivot.loc[5, pivot.columns[1:]] = "08:00"
+    elif edit == "add_column":
+        pivot['2025-01-21'] = "07:15,17:05"
+    else:
+        pivot = pivot.drop(columns=['2025-01-12'])
+
+    frame, expected, changes = ingest_both(pivot_csv, pivot.to_csv(index=False))
+    assert not changes.full_reload and changes.dates
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_range_version_skips_changes_outside_the_range(data_service):
+    data_service.refresh()                                              # v1: full reload
+    data_service.attendance_repo.source.text = PIVOT.replace("07:30", "07:40")
+    data_service.refresh()                                              # v2: 2025-01-01
+
+    # Di luar range: ekspor 01-02..01-03 tetap memakai versi 1
+    assert data_service.range_version(date(2025, 1, 2), date(2025, 1, 3), as_of=2) == 1
+    # Di dalam range: versi baru
+    assert data_service.range_version(date(2025, 1, 1), date(2025, 1, 2), as_of=2) == 2
+
+    data_service.attendance_repo.source.text = PIVOT.replace("07:30", "07:40").replace("08:05", "08:15")
+    data_service.refresh()                                              # v3: 2025-01-03
+    assert data_service.range_version(date(2025, 1, 1), date(2025, 1, 2), as_of=3) == 2
+    assert data_service.range_version(date(2025, 1, 3), date(2025, 1, 3), as_of=3) == 3
+    assert data_service.range_version(date(2025, 1, 2), date(2025, 1, 2), as_of=3) == 1
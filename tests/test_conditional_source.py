@@ -0,0 +1,215 @@
+"""
+ConditionalCsvSource and the repositories' stale-while-revalidate fetch,
+against a local http.server stub (ETag / 304 / hash match / restart / 500).
+"""
+
+import http.server
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from web_app import AppConstants, ConditionalCsvSource, StatusRepository
+
+from .helpers import reset_divisions
+
+STATUS_CSV = (
+    b"Nama Karyawan,Tanggal,Keterangan\n"
+    b"Patra Anggana,2025-01-06,SAKIT\n"
+    b"Su Adam,2025-01-06,CUTI\n"
+)
+
+
+class StubSheet(http.server.BaseHTTPRequestHandler):
+    """Serves state['body']; answers 304 when If-None-Match matches the ETag."""
+
+    state: dict = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        state = self.state
+        state['requests'].append(dict(self.headers))
+        etag = '"%s"' % state['version']
+        if state['status'] != 200:
+            code = state['status']
+        elif state['etag'] and self.headers.get('If-None-Match') == etag:
+            code = 304
+        else:
+            code = 200
+        # Dicatat sebelum respons dikirim: klien bisa langsung memeriksa setelah fetch()
+        state['responses'].append(code)
+        self.send_response(code)
+        if code != 200:
+            self.end_headers()
+            return
+        if state['etag']:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(state['body'])))
+        self.end_headers()
+        if not state['trickle']:
+            self.wfile.write(state['body'])
+            return
+        # Body menetes satu byte per jeda: tiap recv cepat, total download lambat
+        try:
+            for byte in state['body']:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(state['trickle'])
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Klien menyerah di tengah body
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubSheet)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/sheet.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def sheet(server):
+    """Fresh stub state per test; returns (url, state)."""
+    StubSheet.state.clear()
+    StubSheet.state.update(body=STATUS_CSV, version=1, etag=True, status=200, trickle=0, requests=[], responses=[])
+    return server, StubSheet.state
+
+
+def status_repo(url, snapshot_dir) -> StatusRepository:
+    repo = StatusRepository(url)
+    repo.source = ConditionalCsvSource(url, 'status', str(snapshot_dir))
+    return repo
+
+
+def test_200_then_304(sheet, tmp_path):
+    url, state = sheet
+    source = ConditionalCsvSource(url, 'status', str(tmp_path))
+
+    digest = source.fetch()
+    assert source.read_body() == STATUS_CSV
+    assert source.meta['etag'] == '"1"'
+
+    assert source.fetch() == digest
+    assert state['responses'] == [200, 304]
+    assert state['requests'][-1]['If-None-Match'] == '"1"'
+    # 304 tanpa body: isi dibaca dari snapshot disk
+    assert source.read_body() == STATUS_CSV
+
+
+def test_304_returns_same_frame_without_parse(sheet, tmp_path):
+    url, state = sheet
+    reset_divisions()
+    repo = status_repo(url, tmp_path)
+
+    first = repo.fetch()
+    assert first is not None and len(first) == 2
+    assert repo.fetch() is first
+    assert state['responses'] == [200, 304]
+
+
+def test_hash_match_without_etag(sheet, tmp_path):
+    url, state = sheet
+    state['etag'] = False
+    reset_divisions()
+    repo = status_repo(url, tmp_path)
+
+    first = repo.fetch()
+    meta = dict(repo.source.meta)
+    assert repo.fetch() is first
+    assert state['responses'] == [200, 200]
+    assert 'If-None-Match' not in state['requests'][-1]
+    # Isi sama -> snapshot tidak ditulis ulang
+    assert repo.source.meta == meta
+
+
+def test_changed_content_is_reparsed(sheet, tmp_path):
+    url, state = sheet
+    reset_divisions()
+    repo = status_repo(url, tmp_path)
+
+    first = repo.fetch()
+    state['body'] = STATUS_CSV + b"Budiono,2025-01-07,DINAS\n"
+    state['version'] = 2
+    second = repo.fetch()
+    assert second is not first and len(second) == 3
+    assert (tmp_path / 'status.csv').read_bytes() == state['body']
+
+
+def test_warm_restart_from_disk(sheet, tmp_path):
+    url, state = sheet
+    reset_divisions()
+    first = status_repo(url, tmp_path).fetch()
+
+    restarted = status_repo(url, tmp_path)
+    assert restarted.source.meta['etag'] == '"1"'
+    frame = restarted.fetch()
+    assert state['responses'] == [200, 304]
+    assert frame is not None and frame.equals(first)
+
+
+def test_snapshot_from_other_url_is_ignored(sheet, tmp_path):
+    url, state = sheet
+    ConditionalCsvSource(url, 'status', str(tmp_path)).fetch()
+
+    other = ConditionalCsvSource(url + '?gid=1', 'status', str(tmp_path))
+    assert other.meta == {}
+
+
+def test_500_keeps_last_good_frame(sheet, tmp_path):
+    url, state = sheet
+    reset_divisions()
+    repo = status_repo(url, tmp_path)
+    first = repo.fetch()
+    assert repo.last_error is None
+
+    state['status'] = 500
+    with pytest.raises(urllib.error.HTTPError):
+        repo.source.fetch()
+    assert repo.fetch() is first
+    assert '500' in repo.last_error
+
+
+def test_500_on_cold_start_serves_disk_snapshot(sheet, tmp_path):
+    url, state = sheet
+    reset_divisions()
+    first = status_repo(url, tmp_path).fetch()
+
+    state['status'] = 500
+    restarted = status_repo(url, tmp_path)
+    frame = restarted.fetch()
+    assert frame is not None and frame.equals(first)
+    assert restarted.last_error
+
+
+def test_500_on_cold_start_without_snapshot(sheet, tmp_path):
+    url, state = sheet
+    state['status'] = 500
+    repo = status_repo(url, tmp_path)
+
+    assert repo.fetch() is None
+    assert repo.last_error
+
+
+def test_trickling_body_hits_the_total_deadline(sheet, tmp_path, monkeypatch):
+    url, state = sheet
+    reset_divisions()
+    repo = status_repo(url, tmp_path)
+    first = repo.fetch()
+
+    monkeypatch.setattr(AppConstants, 'FETCH_TIMEOUT_SECONDS', 0.5)
+    state['body'] = STATUS_CSV + b"Budiono,2025-01-07,DINAS\n"
+    state['version'] = 2
+    state['trickle'] = 0.05  # ~5 detik untuk seluruh body, tiap byte jauh di bawah batas socket
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError, match="exceeded"):
+        repo.source.fetch()
+    assert time.monotonic() - started < 1.5
+
+    assert repo.fetch() is first
+    assert repo.last_error
@@ -0,0 +1,69 @@
+"""
+SharedDataService revalidation bookkeeping: checked_at only moves on a
+check where every sheet answered.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from .helpers import PIVOT
+
+
+def test_unchanged_check_moves_checked_at(data_service):
+    first = data_service.refresh()
+    second = data_service.refresh()
+
+    assert second.version == first.version
+    assert second.checked_at > first.checked_at
+    assert second.attendance is first.attendance
+
+
+@pytest.mark.parametrize("failing", ["attendance_repo", "status_repo"])
+def test_failed_check_keeps_checked_at(data_service, failing):
+    first = data_service.refresh()
+    getattr(data_service, failing).source.failing = True
+
+    second = data_service.refresh()
+    assert second is first
+    assert second.checked_at == first.checked_at
+    assert data_service.health()['errors']
+
+    getattr(data_service, failing).source.failing = False
+    assert data_service.refresh().checked_at > first.checked_at
+
+
+def test_new_data_with_one_failed_sheet_is_not_marked_checked(data_service):
+    first = data_service.refresh()
+    data_service.status_repo.source.failing = True
+    data_service.attendance_repo.source.text = PIVOT.replace("07:30", "07:35")
+
+    second = data_service.refresh()
+    assert second.version == first.version + 1
+    assert second.loaded_at > first.loaded_at
+    assert second.checked_at == first.checked_at
+
+
+def test_cold_start_failure_is_overdue(data_service):
+    data_service.attendance_repo.source.failing = True
+
+    snapshot = data_service.refresh()
+    assert snapshot.attendance is None
+    assert snapshot.checked_at == datetime.min
+
+
+def test_health_before_first_load_is_loading(data_service):
+    health = data_service.health()
+    assert health['loading'] and not health['loaded'] and health['version'] == 0
+
+    data_service.refresh()
+    health = data_service.health()
+    assert not health['loading'] and health['loaded']
+
+
+def test_failed_first_load_is_offline_not_loading(data_service):
+    data_service.attendance_repo.source.failing = True
+    data_service.refresh()
+
+    health = data_service.health()
+    assert not health['loading'] and not health['loaded']
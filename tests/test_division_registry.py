@@ -0,0 +1,36 @@
+"""
+DivisionRegistry.divisions_for: the cached name -> attribute map matches
+find_by_member and is invalidated when a division is registered.
+"""
+
+import pandas as pd
+
+from web_app import DivisionConfig, DivisionRegistry
+
+from .helpers import reset_divisions
+
+
+def test_divisions_for_matches_find_by_member():
+    names = pd.Series(reset_divisions() + ["Bukan Karyawan"])
+
+    for attribute in ("code", "name"):
+        expected = [
+            getattr(DivisionRegistry.find_by_member(name), attribute, None) for name in names
+        ]
+        result = DivisionRegistry.divisions_for(names, attribute)
+        assert [None if pd.isna(value) else value for value in result] == expected
+        assert DivisionRegistry.divisions_for(names, attribute).equals(result)
+
+
+def test_register_invalidates_cached_map():
+    reset_divisions()
+    names = pd.Series(["Anggota Baru"])
+    assert DivisionRegistry.divisions_for(names).isna().all()
+
+    DivisionRegistry.register(DivisionConfig(
+        name="Divisi Uji", color="#000000", icon="🧪", code="UJI", members=["Anggota Baru"],
+    ))
+    try:
+        assert DivisionRegistry.divisions_for(names).tolist() == ["UJI"]
+    finally:
+        reset_divisions()
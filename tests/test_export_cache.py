@@ -0,0 +1,137 @@
+"""
+ExportCache: one build per key under concurrent first requests, LRU bound,
+large workbooks kept on disk instead of in memory.
+"""
+
+import io
+import tempfile
+import threading
+import time
+
+import pytest
+
+from web_app import AppConstants, ExportArtifact, ExportCache
+
+
+class SlowBuild:
+    """build() callable that counts calls and holds each call until released."""
+
+    def __init__(self, payload: bytes = b"xlsx", result=True, error=None):
+        self.payload = payload
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.error is not None:
+            error, self.error = self.error, None  # Hanya panggilan pertama yang gagal
+            raise error
+        return io.BytesIO(self.payload) if self.result else None
+
+
+def run_concurrently(cache: ExportCache, build: SlowBuild, n: int = 8):
+    results, errors = [None] * n, []
+
+    def worker(i):
+        try:
+            artifact = cache.get_or_build("key", build)
+            results[i] = artifact.read() if artifact is not None else None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    build.started.wait(5)
+    time.sleep(0.05)  # Semua thread sempat sampai di get_or_build
+    build.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_first_requests_build_once():
+    cache = ExportCache()
+    build = SlowBuild()
+
+    results, errors = run_concurrently(cache, build)
+    assert not errors
+    assert build.calls == 1
+    assert results == [b"xlsx"] * 8
+    assert cache.misses == 1 and cache.hits == 7
+    assert cache.get_or_build("key", build).read() == b"xlsx" and build.calls == 1
+
+
+def test_none_is_shared_but_not_cached():
+    cache = ExportCache()
+    build = SlowBuild(result=False)
+
+    results, errors = run_concurrently(cache, build)
+    assert not errors and results == [None] * 8
+    assert build.calls == 1
+    cache.get_or_build("key", build)
+    assert build.calls == 2
+
+
+def test_failed_build_is_retried_by_a_waiter():
+    cache = ExportCache()
+    build = SlowBuild(error=RuntimeError("boom"))
+
+    results, errors = run_concurrently(cache, build)
+    assert len(errors) == 1 and str(errors[0]) == "boom"
+    assert build.calls == 2
+    assert results.count(b"xlsx") == 7
+
+
+def test_lru_keeps_total_bytes_bounded():
+    cache = ExportCache(max_bytes=10)
+    for key in "abc":
+        cache.get_or_build(key, lambda: io.BytesIO(b"12345"))
+
+    built = []
+    assert cache.get_or_build("c", lambda: built.append("c")).read() == b"12345"
+    assert cache.get_or_build("a", lambda: built.append("a")) is None
+    assert built == ["a"]
+
+
+@pytest.mark.parametrize("part", [1, "1", (1,)])
+def test_key_distinguishes_types(part):
+    assert ExportCache.key(part) != ExportCache.key([part])
+
+
+def spooled(payload: bytes) -> tempfile.SpooledTemporaryFile:
+    output = tempfile.SpooledTemporaryFile(max_size=AppConstants.EXPORT_SPOOL_MAX_BYTES)
+    output.write(payload)
+    return output
+
+
+def test_large_workbooks_stay_on_disk(monkeypatch):
+    monkeypatch.setattr(AppConstants, 'EXPORT_SPOOL_MAX_BYTES', 4)
+    small = ExportArtifact.from_output(io.BytesIO(b"1234"))
+    large = ExportArtifact.from_output(spooled(b"123456"))
+    copied = ExportArtifact.from_output(io.BytesIO(b"abcdef"))
+
+    assert small.in_memory and small.read() == b"1234"
+    assert not large.in_memory and large.size == 6
+    assert large.read() == large.read() == b"123456"
+    assert not copied.in_memory and copied.read() == b"abcdef"
+
+
+def test_memory_and_disk_budgets_are_separate(monkeypatch):
+    monkeypatch.setattr(AppConstants, 'EXPORT_SPOOL_MAX_BYTES', 4)
+    cache = ExportCache(max_bytes=8, max_disk_bytes=12)
+    cache.get_or_build("small", lambda: io.BytesIO(b"1234"))
+    for key in ("big1", "big2"):
+        cache.get_or_build(key, lambda: spooled(b"123456"))
+    assert cache._size == 4 and cache._disk_size == 12
+
+    cache.get_or_build("big3", lambda: spooled(b"123456"))
+    built = []
+    assert cache.get_or_build("small", lambda: built.append("small")) is None  # LRU tertua dibuang
+    assert cache.get_or_build("big3", lambda: built.append("big3")).read() == b"123456"
+    assert built == ["small"]
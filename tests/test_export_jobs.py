@@ -0,0 +1,124 @@
+"""
+ExportJobQueue ownership and snapshot-pinned range exports.
+"""
+
+import io
+import threading
+from datetime import date
+
+import pytest
+
+from web_app import ExportCache, ExportJobQueue
+
+from .helpers import PIVOT, STATUS
+
+
+def wait(job, timeout: float = 5.0):
+    job.future.result(timeout)
+    return job
+
+
+def make_queue(**kwargs) -> ExportJobQueue:
+    return ExportJobQueue(ExportCache(), max_workers=1, **kwargs)
+
+
+@pytest.fixture
+def queue():
+    queue = make_queue()
+    yield queue
+    queue._executor.shutdown(wait=True)
+
+
+def test_jobs_are_listed_per_owner(queue):
+    mine = wait(queue.submit("alice", "A", "a.xlsx", "k1", lambda progress: io.BytesIO(b"a")))
+    theirs = wait(queue.submit("bob", "B", "b.xlsx", "k2", lambda progress: io.BytesIO(b"b")))
+
+    assert queue.jobs("alice") == [mine]
+    assert queue.jobs("bob") == [theirs]
+    assert queue.jobs("mallory") == []
+    assert queue.get(mine.job_id, "alice") is mine
+    assert queue.get(mine.job_id, "bob") is None
+
+
+def test_same_export_is_deduplicated_per_owner_and_built_once(queue):
+    calls = []
+
+    def build(progress):
+        calls.append(1)
+        return io.BytesIO(b"range")
+
+    first = wait(queue.submit("alice", "R", "r.xlsx", "same", build))
+    again = queue.submit("alice", "R", "r.xlsx", "same", build)
+    other = wait(queue.submit("bob", "R", "r.xlsx", "same", build))
+
+    assert again is first
+    assert other is not first and other.owner == "bob"
+    assert other.artifact is first.artifact
+    assert first.artifact.read() == b"range"
+    assert len(calls) == 1  # Owner lain dilayani dari ExportCache
+
+
+def test_only_the_owner_can_cancel(queue):
+    release = threading.Event()
+    started = threading.Event()
+
+    def build(progress):
+        started.set()
+        release.wait(5)
+        progress(0.5)
+        return io.BytesIO(b"x")
+
+    job = queue.submit("alice", "R", "r.xlsx", "slow", build)
+    started.wait(5)
+    queue.cancel(job.job_id, "bob")
+    assert not job.cancel_event.is_set()
+
+    queue.cancel(job.job_id, "alice")
+    release.set()
+    assert wait(job).status == "cancelled"
+
+
+def test_history_is_kept_per_owner():
+    queue = make_queue(history=2)
+    theirs = wait(queue.submit("bob", "B", "b.xlsx", "b", lambda progress: io.BytesIO(b"b")))
+    mine = [
+        wait(queue.submit("alice", f"A{i}", "a.xlsx", f"a{i}", lambda progress: io.BytesIO(b"a")))
+        for i in range(5)
+    ]
+
+    assert queue.jobs("alice") == mine[:2:-1]
+    assert queue.jobs("bob") == [theirs]
+    assert queue.get(mine[0].job_id, "alice") is None
+
+
+def test_finished_files_are_capped_by_bytes_per_owner():
+    queue = make_queue(max_bytes=10)
+    first, second, third = [
+        wait(queue.submit("alice", f"A{i}", "a.xlsx", f"a{i}", lambda progress: io.BytesIO(b"x" * 4)))
+        for i in range(3)
+    ]
+    big = wait(queue.submit("bob", "B", "b.xlsx", "b", lambda progress: io.BytesIO(b"y" * 50)))
+
+    # 3 x 4 byte > 10: yang tertua dilepas; file milik bob tidak dihitung untuk alice
+    assert queue.jobs("alice") == [third, second]
+    # Satu job di atas budget tetap disimpan: hasil terbaru selalu bisa diunduh
+    assert queue.jobs("bob") == [big]
+
+
+def test_range_report_reads_the_pinned_snapshot(data_service, attendance_service):
+    start, end = date(2025, 1, 1), date(2025, 1, 3)
+    pinned = data_service.refresh()
+    expected = attendance_service.build_range_report(start, end)
+
+    data_service.attendance_repo.source.text = PIVOT.replace("07:31", "09:31")
+    data_service.status_repo.source.text = STATUS + "Su Adam,2025-01-03,CUTI\n"
+    assert data_service.refresh().version == pinned.version + 1
+
+    report = attendance_service.build_range_report(start, end, pinned)
+    assert report.keys() == expected.keys()
+    for day, (df_final, statuses) in expected.items():
+        assert report[day][0].equals(df_final)
+        assert report[day][1] == statuses
+    assert not attendance_service.build_range_report(start, end)[date(2025, 1, 2)][0].equals(
+        expected[date(2025, 1, 2)][0]
+    )
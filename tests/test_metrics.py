@@ -0,0 +1,61 @@
+"""
+Regression test: AttendanceService.calculate_metrics (mask-based) against the
+previous row-by-row implementation, kept here as the reference.
+"""
+
+import pytest
+
+from web_app import AttendanceService
+
+from .helpers import REPORT_DATE, make_report, reference_metrics, reset_divisions
+
+
+@pytest.fixture(scope="module")
+def service() -> AttendanceService:
+    reset_divisions()
+    return AttendanceService(None, None)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_on_annotated_frames(service, seed):
+    df, statuses = make_report(400, seed)
+    annotated = service.annotate_report(df, statuses, REPORT_DATE)
+
+    expected = reference_metrics(annotated, statuses)
+    assert service.calculate_metrics(annotated, statuses) == expected
+    # Frame harus mencakup semua kategori, kalau tidak perbandingannya kosong
+    for key in ('permit_list', 'absent_list', 'partial_list', 'late_list'):
+        assert expected[key], key
+
+
+def test_matches_reference_on_real_roster(service):
+    roster = reset_divisions()
+    df, statuses = make_report(len(roster), seed=11, names=roster)
+    annotated = service.annotate_report(df, statuses, REPORT_DATE)
+
+    assert service.calculate_metrics(annotated, statuses) == reference_metrics(annotated, statuses)
+
+
+def test_missing_slot_columns_count_as_empty(service):
+    df, statuses = make_report(200, seed=3)
+    annotated = service.annotate_report(df, statuses, REPORT_DATE).drop(columns=['Siang_2'])
+
+    assert service.calculate_metrics(annotated, statuses) == reference_metrics(annotated, statuses)
+
+
+def test_unannotated_frame_counts_nobody_late(service):
+    df, statuses = make_report(200, seed=4)
+
+    metrics = service.calculate_metrics(df, statuses)
+    expected = reference_metrics(df, statuses)
+    # Tanpa kolom Telat_Datang keterlambatan tidak dihitung ulang; kategori lain tetap sama
+    lateness = {'late', 'late_list', 'punctuality_rate'}
+    assert {k: v for k, v in metrics.items() if k not in lateness} == {k: v for k, v in expected.items() if k not in lateness}
+    assert metrics['late'] == 0 and metrics['late_list'] == []
+
+
+def test_empty_frame(service):
+    df, statuses = make_report(0)
+
+    metrics = service.calculate_metrics(service.annotate_report(df, statuses, REPORT_DATE), statuses)
+    assert metrics['total'] == 0 and metrics['attendance_rate'] == 0 and metrics['punctuality_rate'] == 0
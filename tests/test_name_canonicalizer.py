@@ -0,0 +1,50 @@
+"""
+NameCanonicalizer reports: names dropped as unknown, and names moved to a
+roster name only by the difflib near-miss match.
+"""
+
+import pandas as pd
+import pytest
+
+from web_app import AppConstants, NameCanonicalizer
+
+from .helpers import reset_divisions
+
+
+@pytest.fixture(scope="module")
+def pivot() -> pd.DataFrame:
+    reset_divisions()
+    return pd.DataFrame({
+        AppConstants.COL_PERSON_NAME: [
+            "Patra Anggana",       # Persis
+            "PATRA  ANGGANA",      # Normalisasi
+            "Doni Eka Satria",     # Alias
+            "Patra Angana",        # Salah ketik -> difflib
+            "Patra Angana",
+            "Orang Asing",         # Tidak dikenal
+        ],
+        '2025-01-01': ["07:00", "07:01", "07:02", "07:03", None, "07:05"],
+        '2025-01-02': ["07:00", None, None, "07:03", "07:04", "07:05"],
+    })
+
+
+def test_fuzzy_report_lists_only_difflib_matches(pivot):
+    report = NameCanonicalizer.fuzzy_report(pivot, AppConstants.COL_PERSON_NAME)
+
+    assert report.to_dict('records') == [
+        {'Nama Mesin': "Patra Angana", 'Dipetakan Ke': "Patra Anggana", 'Sel': 3},
+    ]
+
+
+def test_unmatched_report_keeps_unknown_names_only(pivot):
+    report = NameCanonicalizer.unmatched_report(pivot, AppConstants.COL_PERSON_NAME)
+
+    assert report['Nama Mesin'].tolist() == ["Orang Asing"]
+    assert report['Sel Dibuang'].tolist() == [2]
+
+
+def test_reports_on_sheet_without_names():
+    empty = pd.DataFrame({'2025-01-01': []})
+
+    assert NameCanonicalizer.fuzzy_report(empty, AppConstants.COL_PERSON_NAME).empty
+    assert NameCanonicalizer.unmatched_report(empty, AppConstants.COL_PERSON_NAME).empty
@@ -0,0 +1,46 @@
+"""
+PerformanceMonitor shared by the background refresher and the UI thread.
+"""
+
+import threading
+
+from web_app import PerformanceMonitor
+
+
+def test_running_timer_keeps_last_duration():
+    monitor = PerformanceMonitor()
+    monitor.start_timer("fetch_total")
+    duration = monitor.end_timer("fetch_total")
+
+    monitor.start_timer("fetch_total")  # Refresh berikutnya sedang jalan
+    assert monitor.get_summary() == {"fetch_total": duration}
+
+
+def test_concurrent_timers_and_readers():
+    monitor = PerformanceMonitor()
+    errors = []
+
+    def timer(name):
+        try:
+            for _ in range(2000):
+                monitor.start_timer(name)
+                monitor.end_timer(name)
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(2000):
+                assert all(isinstance(value, float) for value in monitor.get_summary().values())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=timer, args=(f"fetch_{i % 3}",)) for i in range(6)]
+    threads += [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert not errors
+    assert sorted(monitor.get_summary()) == ["fetch_0", "fetch_1", "fetch_2"]
@@ -0,0 +1,55 @@
+"""
+Regression test: AttendanceService.build_range_report (one pass over the
+range) against build_complete_report called once per day.
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from web_app import AppConstants
+
+from .helpers import make_pivot, reset_divisions
+
+START = date(2025, 1, 1)
+N_DAYS = 12
+
+
+def names_as_object(df: pd.DataFrame) -> pd.DataFrame:
+    # pandas >= 3 menebak dtype str untuk list nama, merge per hari memberi object
+    return df.astype({AppConstants.COL_EMPLOYEE_NAME: object})
+
+
+@pytest.fixture
+def loaded(data_service, attendance_service):
+    names = reset_divisions()
+    pivot = make_pivot(names, N_DAYS, seed=9, start=START)
+    pivot['2025-01-05'] = None  # Hari tanpa log sama sekali
+    data_service.attendance_repo.source.text = pivot.to_csv(index=False)
+    data_service.status_repo.source.text = (
+        "Nama Karyawan,Tanggal,Keterangan,Tanggal_Selesai\n"
+        f"{names[0]},2025-01-02,SAKIT,\n"
+        f"{names[1]},2025-01-03,CUTI,2025-01-07\n"
+        f"{names[2]},2025-01-04,DINAS,2025-01-05\n"
+        f"{names[2]},2025-01-05,SAKIT,\n"
+        "Bukan Karyawan,2025-01-06,IZIN,\n"
+    )
+    data_service.refresh()
+    return attendance_service
+
+
+def test_range_matches_per_day_reports(loaded):
+    end = START + timedelta(days=N_DAYS + 1)  # Dua hari terakhir di luar sheet
+    report = loaded.build_range_report(START, end)
+
+    assert sorted(report) == [START + timedelta(days=i) for i in range(N_DAYS + 2)]
+    for day, (df_range, statuses_range) in report.items():
+        df_day, statuses_day = loaded.build_complete_report(day)
+        pd.testing.assert_frame_equal(names_as_object(df_range), names_as_object(df_day), obj=str(day))
+        assert statuses_range == statuses_day
+        assert loaded.calculate_metrics(df_range, statuses_range) == loaded.calculate_metrics(df_day, statuses_day)
+
+    # Fixture harus mencakup hari berlog, hari kosong dan hari berketerangan
+    assert 'Tanggal' in report[START][0] and 'Tanggal' not in report[date(2025, 1, 5)][0]
+    assert report[date(2025, 1, 5)][1] and not report[end][1]
@@ -0,0 +1,80 @@
+"""
+SlotResultCache: cached slot results equal freshly computed ones, and the
+digest changes whenever the punches, weekday or rule table change.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from web_app import AttendanceRepository, AttendanceService, ShiftRuleTable, SlotResultCache
+
+from .helpers import make_pivot, reset_divisions
+
+
+@pytest.fixture(scope="module")
+def pivot() -> pd.DataFrame:
+    return make_pivot(reset_divisions(), 14, seed=2, start=date(2025, 1, 6))
+
+
+def extract(pivot: pd.DataFrame, service: AttendanceService) -> pd.DataFrame:
+    return service.extract_time_ranges(AttendanceRepository('memory://attendance').transform(pivot))
+
+
+def test_warm_cache_equals_cold_cache(pivot):
+    service = AttendanceService(None, None)
+    cache = service.data_service.slot_cache
+
+    cold = extract(pivot, service)
+    misses = cache.misses
+    warm = extract(pivot, service)
+    assert cache.misses == misses and cache.hits >= len(warm)
+    pd.testing.assert_frame_equal(warm, cold)
+
+
+def test_partly_warm_cache_equals_fresh_service(pivot):
+    service = AttendanceService(None, None)
+    extract(pivot, service)
+
+    edited = pivot.copy()
+    edited.iloc[:20, 3] = "06:50,12:10,13:40,17:30"   # Isi berubah
+    edited.iloc[20:30, 4] = None                      # Hari dihapus
+    edited.iloc[30:40, 5] = edited.iloc[30:40, 6].to_numpy()  # Punch hari lain, weekday beda
+
+    hits = service.data_service.slot_cache.hits
+    warm = extract(edited, service)
+    assert service.data_service.slot_cache.hits > hits
+    pd.testing.assert_frame_equal(warm, extract(edited, AttendanceService(None, None)))
+
+
+def digest(minutes, weekday: int = 0):
+    minutes = np.asarray(minutes, dtype=np.int64)
+    keys, checks = SlotResultCache.digests(
+        minutes, np.zeros(len(minutes), dtype=np.intp), 1, np.array([weekday])
+    )
+    return int(keys[0]), int(checks[0])
+
+
+def test_digest_ignores_punch_order():
+    assert digest([420, 720, 1020]) == digest([1020, 420, 720])
+
+
+@pytest.mark.parametrize("minutes, weekday", [
+    ([421, 720, 1020], 0),         # Satu menit bergeser
+    ([420, 720], 0),               # Punch hilang
+    ([420, 720, 1020, 1020], 0),   # Punch ganda
+    ([420, 720, 1020], 4),         # Hari lain (Jumat)
+])
+def test_digest_changes_with_inputs(minutes, weekday):
+    base = digest([420, 720, 1020])
+    changed = digest(minutes, weekday)
+    assert changed[0] != base[0] and changed[1] != base[1]
+
+
+def test_digest_changes_with_rule_version(monkeypatch):
+    base = digest([420, 720, 1020])
+    monkeypatch.setattr(ShiftRuleTable, 'version', 'f' * 12)
+
+    assert digest([420, 720, 1020]) != base
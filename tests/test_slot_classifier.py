@@ -0,0 +1,87 @@
+"""
+Regression test: columnar slot classifier (extract_time_ranges) and the
+bulk Shift / lateness annotation against the previous per-group
+process_group closure and scalar is_late, kept in helpers as the reference.
+"""
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from web_app import AppConstants, AttendanceRepository, AttendanceSchema, AttendanceService
+
+from .helpers import reference_is_late, reference_time_ranges, reset_divisions
+
+SLOT_COLUMNS = ['Pagi', 'Siang_1', 'Siang_2', 'Sore']
+WEEK_START = date(2025, 1, 6)  # Senin; 2025-01-10 = Jumat
+# Setiap tepi jendela slot / deteksi shift / toleransi telat, plus satu menit di kiri-kanannya
+EDGES = [
+    "07:05", "08:00", "09:00", "09:05", "11:00", "11:30", "12:59", "13:00", "13:30",
+    "14:00", "14:59", "15:00", "16:00", "17:00", "18:00", "19:00",
+]
+
+
+def boundary_punches(rng: random.Random) -> str:
+    def around(edge: str) -> str:
+        hour, minute = map(int, edge.split(':'))
+        total = hour * 60 + minute + rng.choice((-1, 0, 1))
+        return f"{total // 60:02d}:{total % 60:02d}"
+
+    punches = [
+        around(rng.choice(EDGES)) if rng.random() < 0.6 else f"{rng.randint(5, 22):02d}:{rng.randint(0, 59):02d}"
+        for _ in range(rng.randint(1, 6))
+    ]
+    return ",".join(punches)
+
+
+@pytest.fixture(scope="module")
+def flat() -> pd.DataFrame:
+    names = reset_divisions()
+    rng = random.Random(7)
+    pivot = {AppConstants.COL_PERSON_NAME: names}
+    for offset in range(14):
+        day = (WEEK_START + timedelta(days=offset)).isoformat()
+        pivot[day] = [boundary_punches(rng) if rng.random() < 0.9 else None for _ in names]
+    return AttendanceRepository('memory://attendance').transform(pd.DataFrame(pivot))
+
+
+@pytest.fixture(scope="module")
+def service() -> AttendanceService:
+    return AttendanceService(None, None)
+
+
+def by_key(df: pd.DataFrame) -> pd.DataFrame:
+    """Slot columns in (name, date) order; registry vs alphabetical row order is not part of the contract."""
+    columns = [AppConstants.COL_EMPLOYEE_NAME, 'Tanggal'] + SLOT_COLUMNS
+    frame = df[columns].astype({AppConstants.COL_EMPLOYEE_NAME: object})
+    return frame.sort_values(columns[:2]).reset_index(drop=True)
+
+
+def test_slots_match_process_group(service, flat):
+    result = service.extract_time_ranges(flat)
+    expected = reference_time_ranges(AttendanceSchema.expand(flat, ['Tanggal']))
+
+    assert len(result) > 1000
+    pd.testing.assert_frame_equal(by_key(result), by_key(expected), check_dtype=False)
+    # Fixture harus mengisi setiap slot, kalau tidak perbandingannya kosong
+    for slot in SLOT_COLUMNS:
+        assert (result[slot] != '').any() and (result[slot] == '').any(), slot
+
+
+def test_shift_and_late_flag_match_scalar_is_late(service, flat):
+    times = service.extract_time_ranges(flat)
+    weekdays = np.array([day.weekday() for day in times['Tanggal']], dtype=np.intp)
+    annotated = service._annotate(times, np.full(len(times), '', dtype=object), weekdays)
+
+    expected = [
+        reference_is_late(row['Pagi'], row[AppConstants.COL_EMPLOYEE_NAME], row['Sore'])
+        for _, row in times.iterrows()
+    ]
+    assert annotated[AppConstants.COL_SHIFT].tolist() == [shift for _, shift in expected]
+    assert annotated[AppConstants.COL_LATE_ARRIVAL].tolist() == [late for late, _ in expected]
+    assert {'SHIFT 1', 'SHIFT 2', ''} <= set(annotated[AppConstants.COL_SHIFT])
+    assert annotated[AppConstants.COL_LATE_ARRIVAL].any()
+
@@ -0,0 +1,52 @@
+"""
+StatusCalendar expands interval rows to one entry per day; intervals are
+capped at MAX_STATUS_INTERVAL_DAYS so malformed end dates stay bounded.
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+
+from web_app import AppConstants, StatusCalendar
+
+
+def calendar(rows) -> StatusCalendar:
+    return StatusCalendar(
+        pd.DataFrame(rows, columns=['Nama Karyawan', 'Tanggal', 'Keterangan', 'Tanggal_Selesai'])
+    )
+
+
+def test_interval_is_fully_expanded():
+    cal = calendar([("Andi", "2025-01-03", "CUTI", "2025-01-07")])
+
+    days = [date(2025, 1, 3) + timedelta(days=i) for i in range(5)]
+    assert sorted(cal.between(date(2025, 1, 1), date(2025, 1, 31))) == days
+
+
+def test_leave_past_the_loaded_punches_still_resolves(data_service):
+    data_service.attendance_repo.source.text = (
+        "Person Name,2025-01-17,2025-01-18\n"
+        "Budi,07:00,07:01\n"
+    )
+    data_service.status_repo.source.text = (
+        "Nama Karyawan,Tanggal,Keterangan,Tanggal_Selesai\n"
+        "Andi,2025-01-10,CUTI,2025-01-25\n"
+    )
+    statuses = data_service.refresh().statuses
+
+    for day in (date(2025, 1, 10), date(2025, 1, 19), date(2025, 1, 25)):
+        assert statuses.for_date(day) == {"Andi": "CUTI"}, day
+    assert statuses.for_date(date(2025, 1, 26)) == {}
+
+
+def test_open_ended_interval_is_capped():
+    cal = calendar([
+        ("Andi", "2025-01-20", "CUTI", "2250-12-31"),
+        ("Budi", "2025-01-20", "DINAS", "2205-01-20"),
+    ])
+
+    last = date(2025, 1, 20) + timedelta(days=AppConstants.MAX_STATUS_INTERVAL_DAYS - 1)
+    days = sorted(cal._by_date)
+    assert len(days) == AppConstants.MAX_STATUS_INTERVAL_DAYS and days[-1] == last
+    assert cal.for_date(last) == {"Andi": "CUTI", "Budi": "DINAS"}
+    assert cal.for_date(last + timedelta(days=1)) == {}
@@ -9,22 +9,43 @@ Architecture: Clean Architecture with MVC Pattern
 
 import streamlit as st
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+import numpy as np
 from datetime import time, datetime, timedelta, date
 import io
+import tempfile
+import shutil
 import xlsxwriter
+from xlsxwriter.utility import xl_rowcol_to_cell, xl_range
 import streamlit.components.v1 as components
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, FrozenSet, Callable
+from collections import deque, OrderedDict
+import dataclasses
 from dataclasses import dataclass, field
 from enum import Enum
 from abc import ABC, abstractmethod
 import json
+import os
+import urllib.error
+import urllib.request
 import hashlib
+import difflib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+import uuid
+import secrets
 from functools import lru_cache
+from time import monotonic
 import plotly.express as px
 import plotly.graph_objects as go
 from PIL import Image
 import base64
 
+# Copy-on-Write (default sejak pandas 3): snapshot data bersama bisa dipotong dan
+# dibagikan ke semua sesi tanpa .copy(); perubahan di turunannya tidak bocor balik.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
 # ================================================================================
 # SECTION 1: CONFIGURATION & CONSTANTS LAYER
 # ================================================================================
@@ -42,9 +63,16 @@ class AppConstants:
     # Column Names
     COL_PERSON_NAME = 'Person Name'
     COL_EVENT_TIME = 'Event Time'
+    COL_DAY_NUMBER = 'Hari_Ke'         # Hari sejak 1970-01-01 (int32)
+    COL_MINUTE_OF_DAY = 'Menit_Hari'   # Menit dalam sehari 0-1439 (int32)
     COL_EMPLOYEE_NAME = 'Nama Karyawan'
     COL_DATE = 'Tanggal'
     COL_STATUS = 'Keterangan'
+    COL_END_DATE = 'Tanggal_Selesai'   # Opsional di sheet status: izin/cuti beberapa hari
+    COL_SHIFT = 'Shift'
+    COL_LATE_ARRIVAL = 'Telat_Datang'
+    COL_LATE_RETURN = 'Telat_Balik'
+    COL_STATUS_CODE = 'Status_Code'
     
     # --- LOGIC CONSTANTS ---
     
@@ -70,10 +98,46 @@ class AppConstants:
     S2_NORM_BREAK_IN_END    = time(16, 0, 0) # Lewat 16:00 = Merah
 
     # Note: Hari Jumat Shift 2 ikut jam istirahat Shift 1
-    
+
+    # SLOT KOLOM LAPORAN (Pagi / Siang_1 / Siang_2 / Sore) - batas inklusif
+    SLOT_PAGI_END           = time(10, 59, 59)   # Pagi: < 11:00 (semua shift)
+    SLOT_S1_BREAK_OUT_START = time(11, 30, 0)    # Buffer keluar istirahat S1 (juga S2 Jumat)
+    SLOT_S1_BREAK_OUT_END   = time(12, 59, 59)
+    SLOT_S2_BREAK_OUT_START = time(13, 30, 0)    # Buffer keluar istirahat S2 normal
+    SLOT_S2_BREAK_OUT_END   = time(14, 59, 59)
+    SLOT_SORE_START         = time(16, 0, 0)     # Log terakhir >= 16:00 = Sore
+
+    # DETEKSI SHIFT 2
+    S2_DETECT_HOME_AFTER     = time(19, 0, 0)    # Pulang lewat 19:00 = Shift 2
+    S2_DETECT_ARRIVAL_START  = time(9, 0, 0)     # Log pertama di jam nanggung = Shift 2
+    S2_DETECT_ARRIVAL_END    = time(11, 0, 0)
+    S2_DETECT_EVENING_AFTER  = time(18, 0, 0)    # TimeService.is_late: pulang lewat 18:00
+    S2_DETECT_BREAK_AFTER    = time(13, 30, 0)   # TimeService.is_late: istirahat lewat 13:30
+    S2_EXCEL_ARRIVAL_START   = time(8, 0, 0)     # Excel: datang 08:00 - 11:30
+    S2_EXCEL_ARRIVAL_END     = time(11, 30, 0)
+
     # System Config
     CACHE_TTL_SECONDS = 10
     MAX_CACHE_ENTRIES = 100
+    CHANGE_FEED_LENGTH = 100           # Jumlah versi snapshot yang disimpan di change feed
+    INGEST_COLUMN_BLOCK = 64           # Kolom tanggal per blok saat unpivot (batas memori sementara)
+    MAX_STATUS_INTERVAL_DAYS = 366     # Izin/cuti terpanjang yang diperluas per hari (Tanggal_Selesai rusak)
+    NAME_MATCH_CUTOFF = 0.9            # Kemiripan minimal (difflib) untuk nama mesin yang salah ketik
+    EXPORT_CACHE_MAX_BYTES = 64 * 2**20  # Workbook Excel yang disimpan untuk diunduh ulang (LRU)
+    EXPORT_SPOOL_MAX_BYTES = 8 * 2**20   # Workbook lebih besar dari ini ditulis/disimpan di file sementara
+    EXPORT_CACHE_MAX_DISK_BYTES = 512 * 2**20  # Workbook besar (file sementara) yang disimpan di ExportCache
+    EXPORT_JOB_WORKERS = 2             # Export besar yang jalan bersamaan di background
+    EXPORT_JOB_HISTORY = 20            # Job selesai (beserta file-nya) per pemilik yang tetap bisa diunduh
+    EXPORT_JOB_OWNER_MAX_BYTES = 256 * 2**20  # Total ukuran file hasil job yang disimpan per pemilik
+    EXPORT_OWNER_PARAM = "export"      # Query param berisi token pemilik job export (tahan refresh)
+    SLOT_CACHE_MAX_ENTRIES = 500_000   # LRU hasil slot per (orang, tanggal), ~32 byte per entri
+    FETCH_TIMEOUT_SECONDS = 8          # Batas total download sheet (koneksi + seluruh body)
+    FETCH_CHUNK_BYTES = 64 * 1024      # Body dibaca per potongan supaya batas total bisa dicek
+    STALE_AFTER_SECONDS = 60           # Data lebih tua dari ini ditandai STALE di sidebar
+    # Snapshot berisi data absensi pribadi: simpan di cache user, bukan di folder repo
+    SNAPSHOT_DIR = os.environ.get('ABSENCE_SNAPSHOT_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+        'wedabay-absence', 'sheet_snapshots')
     SIDEBAR_STATE = "expanded"
     LAYOUT_MODE = "wide"
     CARDS_PER_ROW = 4
@@ -147,6 +211,20 @@ class DivisionConfig:
         return hash((self.name, self.code))
 
 
+@dataclass(frozen=True)
+class SlotRule:
+    """
+    Data class describing one attendance slot window for a shift.
+    Windows are inclusive; punches after `late_after` are flagged late.
+    """
+    shift: str
+    slot: str
+    start: time
+    end: time
+    weekdays: Tuple[int, ...] = (0, 1, 2, 3, 4, 5, 6)
+    late_after: Optional[time] = None
+
+
 class DataSourceConfig:
     # GANTI YANG INI DENGAN LINK BARU:
     ATTENDANCE_SHEET_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQ_GhoIb1riX98FsP8W4f2-_dH_PLcLDZskjNOyDcnnvOhBg8FUp3xJ-c_YgV0Pw71k4STy4rR0_MS5/pub?gid=1877240181&single=true&output=csv"
@@ -169,6 +247,11 @@ class DivisionRegistry:
     """
     
     _divisions: Dict[str, DivisionConfig] = {}
+    # Index nama -> divisi (divisi pertama yang terdaftar menang) dan
+    # urutan anggota berdasarkan priority; dibangun ulang setiap register.
+    _member_index: Dict[str, DivisionConfig] = {}
+    _ordered_members: Optional[Tuple[str, ...]] = None
+    _attribute_maps: Dict[str, Dict[str, Any]] = {}
     
     @classmethod
     def register(cls, division: DivisionConfig) -> None:
@@ -176,6 +259,10 @@ class DivisionRegistry:
         if division.name in cls._divisions:
             raise ValueError(f"Division {division.name} already registered")
         cls._divisions[division.name] = division
+        for member in division.members:
+            cls._member_index.setdefault(member, division)
+        cls._ordered_members = None
+        cls._attribute_maps = {}
     
     @classmethod
     def get(cls, name: str) -> Optional[DivisionConfig]:
@@ -189,27 +276,183 @@ class DivisionRegistry:
     
     @classmethod
     def find_by_member(cls, member_name: str) -> Optional[DivisionConfig]:
-        """Find division by member name."""
-        for division in cls._divisions.values():
-            if member_name in division.members:
-                return division
-        return None
+        """Find division by member name (O(1) via the member index)."""
+        return cls._member_index.get(member_name)
+    
+    @classmethod
+    def divisions_for(cls, names: pd.Series, attribute: str = "code") -> pd.Series:
+        """
+        Bulk find_by_member for a whole column.
+        Returns the given DivisionConfig attribute per name (NaN if not a member).
+        The name -> attribute map is cached per attribute until the next register.
+        """
+        lookup = cls._attribute_maps.get(attribute)
+        if lookup is None:
+            lookup = {member: getattr(division, attribute) for member, division in cls._member_index.items()}
+            cls._attribute_maps[attribute] = lookup
+        return names.map(lookup)
     
     @classmethod
     def get_all_members(cls) -> List[str]:
         """Get all employee names across all divisions."""
-        members = []
-        
-        # 1. Pastikan urutan divisi berdasarkan Priority (1, 2, 3...)
-        # Ini supaya SPT & SPV (Patra, Su Adam) selalu paling atas
-        sorted_divisions = sorted(cls._divisions.values(), key=lambda x: x.priority)
-        
-        for division in sorted_divisions:
-            members.extend(division.members)
+        if cls._ordered_members is None:
+            members = []
             
-        # 2. Hapus nama ganda TAPI JANGAN di-sort A-Z. 
-        # Kita pakai trik 'dict.fromkeys' agar urutan Patra, Su Adam, dst tetap terjaga.
-        return list(dict.fromkeys(members))
+            # 1. Pastikan urutan divisi berdasarkan Priority (1, 2, 3...)
+            # Ini supaya SPT & SPV (Patra, Su Adam) selalu paling atas
+            sorted_divisions = sorted(cls._divisions.values(), key=lambda x: x.priority)
+            
+            for division in sorted_divisions:
+                members.extend(division.members)
+                
+            # 2. Hapus nama ganda TAPI JANGAN di-sort A-Z. 
+            # Kita pakai trik 'dict.fromkeys' agar urutan Patra, Su Adam, dst tetap terjaga.
+            cls._ordered_members = tuple(dict.fromkeys(members))
+        return list(cls._ordered_members)
+
+
+class NameCanonicalizer:
+    """
+    Machine name -> registry name, resolved once per distinct value.
+    Lookup order: exact member, explicit alias (ALIASES), normalized form
+    (case, spacing, '.' and ','), then a cached difflib match for near-misses.
+    The index is rebuilt automatically when the roster changes.
+    """
+    
+    # TRANSLATOR NAMA (MESIN -> DASHBOARD)
+    # Mengubah nama panjang dari mesin menjadi singkatan sesuai kemauanmu
+    ALIASES: Dict[str, str] = {
+        "Doni Eka Satria": "Doni Eka",
+        "Maikel Renato Syafaruddin": "Maikel R",
+        "Hamzah M. Ali Gani": "Hamzah M Ali Gani",
+        "Aditya Sugiantoro Abbas": "Aditya Sugiantoro A",
+        "Muhamad Usman": "M.Usman",
+        "M Akbar D Patty": "M.Akbar Patty",
+        "Daniel Freski Wangka": "Daniel Freski W",
+        "Fandi M. Naser": "Fandi M Naser",
+        "Agung Fadjriansyah Ano": "Agung F",
+        "Deni Hendri Bobode": "Deni Hendri",
+        "Muhammad Rifai": "M Rifai",
+        "Idrus Arsad, SH": "Idrus Arsad"
+    }
+    
+    # Compiled index (built lazily per roster)
+    _members: Optional[Tuple[str, ...]] = None
+    _exact: Dict[str, str] = {}
+    _normalized: Dict[str, str] = {}
+    _fuzzy_cache: Dict[str, Optional[str]] = {}
+    
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Comparison key: casefolded, '.'/',' as spaces, single spaces."""
+        return ' '.join(name.replace('.', ' ').replace(',', ' ').split()).casefold()
+    
+    @classmethod
+    def compile(cls) -> None:
+        """Build the exact and normalized indexes for the current roster (idempotent)."""
+        members = tuple(DivisionRegistry.get_all_members())
+        if members == cls._members:
+            return
+        
+        member_set = set(members)
+        exact = {member: member for member in members}
+        exact.update({alias: target for alias, target in cls.ALIASES.items() if target in member_set})
+        normalized: Dict[str, str] = {}
+        for name, target in exact.items():
+            normalized.setdefault(cls.normalize(name), target)  # Nama asli di depan, menang
+        
+        cls._exact, cls._normalized = exact, normalized
+        cls._fuzzy_cache = {}
+        cls._members = members
+    
+    @classmethod
+    def resolve(cls, name: Any) -> Optional[str]:
+        """Registry name for one machine name, None if it matches nobody."""
+        cls.compile()
+        if not isinstance(name, str):
+            return None
+        if name in cls._exact:
+            return cls._exact[name]
+        key = cls.normalize(name)
+        if key in cls._normalized:
+            return cls._normalized[key]
+        if key not in cls._fuzzy_cache:
+            candidates = difflib.get_close_matches(
+                key, list(cls._normalized), n=2, cutoff=AppConstants.NAME_MATCH_CUTOFF
+            )
+            targets = {cls._normalized[candidate] for candidate in candidates}
+            # Dua kandidat ke orang berbeda = ambigu, lebih aman dibuang & dilaporkan
+            cls._fuzzy_cache[key] = targets.pop() if len(targets) == 1 else None
+        return cls._fuzzy_cache[key]
+    
+    @classmethod
+    def is_fuzzy(cls, name: Any) -> bool:
+        """True when resolve(name) found its registry name only through the difflib match."""
+        if not isinstance(name, str) or name in cls._exact:
+            return False
+        key = cls.normalize(name)
+        return key not in cls._normalized and cls._fuzzy_cache.get(key) is not None
+    
+    @classmethod
+    def canonicalize(cls, names: pd.Series) -> pd.Series:
+        """Bulk resolve(): each distinct value is looked up once (NaN = unmatched)."""
+        codes, uniques = pd.factorize(names)
+        resolved = np.array([cls.resolve(name) for name in uniques] + [None], dtype=object)
+        return pd.Series(resolved[codes], index=names.index, name=names.name)
+    
+    @classmethod
+    def unmatched_report(cls, df: pd.DataFrame, name_column: str) -> pd.DataFrame:
+        """
+        Machine names of a pivot sheet that match nobody, with how many date cells
+        (punches) were dropped because of them and the closest roster name.
+        """
+        columns = ['Nama Mesin', 'Sel Dibuang', 'Nama Terdekat']
+        if df.empty or name_column not in df.columns:
+            return pd.DataFrame(columns=columns)
+        
+        resolved = cls.canonicalize(df[name_column])
+        dropped = df[resolved.isna() & df[name_column].notna()]
+        if dropped.empty:
+            return pd.DataFrame(columns=columns)
+        
+        cells = dropped.drop(columns=name_column).notna().sum(axis=1)
+        per_name = cells.groupby(dropped[name_column].astype(str), sort=False).sum()
+        nearest = [
+            next(iter(difflib.get_close_matches(cls.normalize(name), list(cls._normalized), n=1, cutoff=0.6)), None)
+            for name in per_name.index
+        ]
+        return pd.DataFrame({
+            'Nama Mesin': per_name.index,
+            'Sel Dibuang': per_name.to_numpy(),
+            'Nama Terdekat': [cls._normalized[key] if key else '' for key in nearest],
+        }).sort_values('Sel Dibuang', ascending=False, kind='stable').reset_index(drop=True)
+    
+    @classmethod
+    def fuzzy_report(cls, df: pd.DataFrame, name_column: str) -> pd.DataFrame:
+        """
+        Machine names of a pivot sheet that were assigned to a roster name only by
+        the difflib match, with that name and how many date cells (punches) it got,
+        so admins can confirm the reassignment or add an alias.
+        """
+        columns = ['Nama Mesin', 'Dipetakan Ke', 'Sel']
+        if df.empty or name_column not in df.columns:
+            return pd.DataFrame(columns=columns)
+        
+        resolved = cls.canonicalize(df[name_column])
+        fuzzy = df[name_column].map(cls.is_fuzzy).astype(bool)
+        matched = df[fuzzy]
+        if matched.empty:
+            return pd.DataFrame(columns=columns)
+        
+        cells = matched.drop(columns=name_column).notna().sum(axis=1)
+        per_pair = cells.groupby(
+            [matched[name_column].astype(str), resolved[fuzzy].astype(str)], sort=False
+        ).sum()
+        return pd.DataFrame({
+            'Nama Mesin': per_pair.index.get_level_values(0),
+            'Dipetakan Ke': per_pair.index.get_level_values(1),
+            'Sel': per_pair.to_numpy(),
+        }).sort_values('Sel', ascending=False, kind='stable').reset_index(drop=True)
 
 
 # Initialize Division Registry with actual data
@@ -287,6 +530,269 @@ class DataRepository(ABC):
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         """Transform raw data to application format."""
         pass
+    
+    def _fetch_sheet(self, parse, error_prefix: str) -> Optional[pd.DataFrame]:
+        """
+        Stale-while-revalidate fetch shared by the sheet repositories.
+        Unchanged content returns the cached frame (same object, no parse); a
+        failed or timed-out download keeps serving the last good frame (memory,
+        else the disk snapshot) and only records last_error.
+        """
+        try:
+            content_hash = self.source.fetch()
+        except Exception as e:
+            self.last_error = f"{error_prefix}{str(e)}"
+            if self._cache is not None or not self.source.meta.get('sha256'):
+                return self._cache
+            content_hash = self.source.meta['sha256']  # Cold start offline: pakai snapshot disk
+        else:
+            self.last_error = None
+            self.last_success = datetime.now()
+        
+        if self._cache is not None and content_hash == self._cache_hash:
+            return self._cache
+        
+        try:
+            df = parse(self.source.read_body())
+        except Exception as e:
+            self.last_error = f"{error_prefix}{str(e)}"
+            return self._cache
+        if df is None:
+            return self._cache
+        
+        self._cache, self._cache_hash, self._cache_time = df, content_hash, datetime.now()
+        return df
+
+
+class ConditionalCsvSource:
+    """
+    Published-sheet CSV download with HTTP validators and an on-disk snapshot.
+    Sends If-None-Match / If-Modified-Since from the last response; a 304 or a
+    body with the same SHA-256 counts as unchanged. The last body and its
+    validators live in SNAPSHOT_DIR (user cache dir, or $ABSENCE_SNAPSHOT_DIR)
+    so a restarted process starts warm.
+    """
+    
+    def __init__(self, url: str, name: str, snapshot_dir: str = AppConstants.SNAPSHOT_DIR):
+        self.url = url
+        self.body_path = os.path.join(snapshot_dir, f"{name}.csv")
+        self.meta_path = os.path.join(snapshot_dir, f"{name}.json")
+        self.meta: Dict[str, str] = self._read_meta()
+        self._body: Optional[bytes] = None
+    
+    def _read_meta(self) -> Dict[str, str]:
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Meta tanpa body (atau dari URL lain) tidak berguna
+        if meta.get('url') != self.url or not os.path.exists(self.body_path):
+            return {}
+        return meta
+    
+    def _write_snapshot(self, body: bytes) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.body_path), exist_ok=True)
+            for path, data in ((self.body_path, body),
+                               (self.meta_path, json.dumps(self.meta).encode('utf-8'))):
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except OSError:
+            pass  # Disk read-only / penuh: tetap jalan, hanya tidak warm saat restart
+    
+    def fetch(self) -> str:
+        """
+        Conditional GET. Returns the SHA-256 of the current content; read the
+        bytes with read_body() only if the hash differs from what you have.
+        The whole download, body included, is bounded by FETCH_TIMEOUT_SECONDS.
+        """
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        
+        # timeout urlopen berlaku per operasi socket; body yang menetes pelan dibatasi deadline
+        deadline = monotonic() + AppConstants.FETCH_TIMEOUT_SECONDS
+        try:
+            request = urllib.request.Request(self.url, headers=headers)
+            with urllib.request.urlopen(request, timeout=AppConstants.FETCH_TIMEOUT_SECONDS) as response:
+                body = self._read_until(response, deadline)
+                etag = response.headers.get('ETag', '')
+                last_modified = response.headers.get('Last-Modified', '')
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and self.meta.get('sha256'):
+                return self.meta['sha256']
+            raise
+        
+        digest = hashlib.sha256(body).hexdigest()
+        if (digest, etag, last_modified) != (self.meta.get('sha256'), self.meta.get('etag', ''),
+                                             self.meta.get('last_modified', '')):
+            self.meta = {'url': self.url, 'sha256': digest, 'etag': etag, 'last_modified': last_modified,
+                         'fetched_at': datetime.now().strftime(AppConstants.DATETIME_FORMAT)}
+            self._write_snapshot(body)
+        self._body = body
+        return digest
+    
+    @staticmethod
+    def _read_until(response, deadline: float) -> bytes:
+        """
+        Read the whole body in chunks, raising TimeoutError once the monotonic
+        deadline passes. A single stalled read is bounded by the urlopen timeout.
+        """
+        chunks = []
+        while True:
+            chunk = response.read1(AppConstants.FETCH_CHUNK_BYTES)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+            if monotonic() > deadline:
+                raise TimeoutError(f"download exceeded {AppConstants.FETCH_TIMEOUT_SECONDS}s")
+    
+    def read_body(self) -> bytes:
+        """Bytes of the current content (last download, else the disk snapshot)."""
+        body, self._body = self._body, None
+        if body is not None:
+            return body
+        with open(self.body_path, 'rb') as f:
+            return f.read()
+
+
+class AttendanceSchema:
+    """
+    Compact layout of the flat attendance frame (one row per punch):
+    Person Name is a categorical in registry order (its codes are the employee
+    codes), Event Time stays datetime64, and Hari_Ke / Menit_Hari are int32.
+    The display columns Tanggal / Waktu / Jam / Menit / Hari are derived on
+    demand with expand() instead of being stored per row.
+    """
+    
+    COLUMNS = [
+        AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME,
+        AppConstants.COL_DAY_NUMBER, AppConstants.COL_MINUTE_OF_DAY
+    ]
+    DERIVED = ['Tanggal', 'Waktu', 'Jam', 'Menit', 'Hari']
+    
+    @staticmethod
+    def employee_dtype() -> pd.CategoricalDtype:
+        """Categorical dtype of Person Name: the roster, in DivisionRegistry order."""
+        return pd.CategoricalDtype(DivisionRegistry.get_all_members())
+    
+    @classmethod
+    def empty(cls) -> pd.DataFrame:
+        return pd.DataFrame({
+            AppConstants.COL_PERSON_NAME: pd.Series([], dtype=cls.employee_dtype()),
+            AppConstants.COL_EVENT_TIME: pd.Series([], dtype='datetime64[ns]'),
+            AppConstants.COL_DAY_NUMBER: pd.Series([], dtype=np.int32),
+            AppConstants.COL_MINUTE_OF_DAY: pd.Series([], dtype=np.int32),
+        })
+    
+    @classmethod
+    def compact(cls, names: np.ndarray, event_time: np.ndarray) -> pd.DataFrame:
+        """Build the compact frame from roster names and datetime64 event times."""
+        event_time = np.asarray(event_time, dtype='datetime64[ns]')
+        minutes_since_epoch = event_time.astype('datetime64[m]').astype(np.int64)
+        return pd.DataFrame({
+            AppConstants.COL_PERSON_NAME: pd.Categorical(names, dtype=cls.employee_dtype()),
+            AppConstants.COL_EVENT_TIME: event_time,
+            AppConstants.COL_DAY_NUMBER: (minutes_since_epoch // 1440).astype(np.int32),
+            AppConstants.COL_MINUTE_OF_DAY: (minutes_since_epoch % 1440).astype(np.int32),
+        })
+    
+    @staticmethod
+    def to_dates(day_numbers: np.ndarray) -> np.ndarray:
+        """Hari_Ke values -> array of datetime.date objects."""
+        return np.asarray(day_numbers).astype('datetime64[D]').astype(object)
+    
+    @classmethod
+    def expand(cls, df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Copy of df with the requested display columns (default: all of DERIVED)."""
+        derived = {
+            'Tanggal': lambda: cls.to_dates(df[AppConstants.COL_DAY_NUMBER].to_numpy()),
+            'Waktu': lambda: df[AppConstants.COL_EVENT_TIME].dt.time,
+            'Jam': lambda: df[AppConstants.COL_MINUTE_OF_DAY] // 60,
+            'Menit': lambda: df[AppConstants.COL_MINUTE_OF_DAY] % 60,
+            'Hari': lambda: df[AppConstants.COL_EVENT_TIME].dt.day_name(),
+        }
+        return df.assign(**{col: derived[col]() for col in (columns or cls.DERIVED)})
+
+
+class DatePartitionIndex:
+    """
+    Date -> row-slice index over the flat attendance frame.
+    The frame is kept sorted by (Tanggal, Person Name, Event Time), so one
+    day is a contiguous slice and a date range is two binary searches.
+    Built once per fetch and shared by all sessions; never modify self.frame
+    in place (slices are copy-on-write, so derived frames are safe to change).
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        days = self._day_keys(df)
+        if len(days) > 1 and (days[1:] < days[:-1]).any():
+            df = self.sort_frame(df)
+            days = self._day_keys(df)
+        
+        self.frame = df
+        self._days = days
+        self._days.setflags(write=False)
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.array([], dtype=np.int64)
+        ends = np.r_[starts[1:], len(days)].astype(np.int64)
+        self._slices: Dict[datetime.date, slice] = {
+            day: slice(int(start), int(end))
+            for day, start, end in zip(days[starts].astype(object), starts, ends)
+        }
+    
+    @staticmethod
+    def _day_keys(df: pd.DataFrame) -> np.ndarray:
+        """Event Time truncated to days (datetime64[D]) for fast comparisons."""
+        if AppConstants.COL_DAY_NUMBER in df.columns:
+            return df[AppConstants.COL_DAY_NUMBER].to_numpy().astype('datetime64[D]')
+        event_time = df[AppConstants.COL_EVENT_TIME]
+        if not pd.api.types.is_datetime64_dtype(event_time):
+            event_time = pd.to_datetime(event_time)
+        return event_time.to_numpy().astype('datetime64[D]')
+    
+    @staticmethod
+    def sort_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Sort by (day, person, event time) without comparing Python date objects."""
+        event_time = pd.to_datetime(df[AppConstants.COL_EVENT_TIME]).to_numpy()
+        names = df[AppConstants.COL_PERSON_NAME]
+        if isinstance(names.dtype, pd.CategoricalDtype):
+            person_codes = names.cat.codes.to_numpy()  # Urutan registry
+        else:
+            person_codes, _ = pd.factorize(names, sort=True)
+        order = np.lexsort((event_time, person_codes, event_time.astype('datetime64[D]')))
+        return df.iloc[order].reset_index(drop=True)
+    
+    @property
+    def dates(self) -> List[datetime.date]:
+        """All dates with at least one punch, ascending."""
+        return list(self._slices)
+    
+    def for_date(self, target_date: datetime.date) -> pd.DataFrame:
+        """Rows of one day (copy-on-write view of the shared frame)."""
+        return self.frame.iloc[self._slices.get(target_date, slice(0, 0))]
+    
+    def between(self, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
+        """Rows with start_date <= Tanggal <= end_date (copy-on-write view)."""
+        lo = np.searchsorted(self._days, np.datetime64(start_date, 'D'), side='left')
+        hi = np.searchsorted(self._days, np.datetime64(end_date, 'D'), side='right')
+        return self.frame.iloc[lo:hi]
+
+
+@dataclass(frozen=True)
+class AttendanceChangeSet:
+    """
+    Change feed entry of one attendance ingest.
+    keys = (Person Name, date) pairs whose punches changed; full_reload means
+    "everything may have changed" (first load, roster/name column changed).
+    """
+    dates: FrozenSet[datetime.date]
+    keys: FrozenSet[Tuple[str, datetime.date]]
+    full_reload: bool = False
 
 
 class AttendanceRepository(DataRepository):
@@ -297,24 +803,133 @@ class AttendanceRepository(DataRepository):
     
     def __init__(self, url: str):
         self.url = url
+        self.source = ConditionalCsvSource(url, 'attendance')
         self._cache: Optional[pd.DataFrame] = None
+        self._cache_hash: Optional[str] = None
         self._cache_time: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[datetime] = None
+        self._column_hashes: Dict[str, str] = {}
+        self.last_changes: Optional[AttendanceChangeSet] = None
+        self.memory_report: Dict[str, int] = {}
+        self.unmatched_names: pd.DataFrame = pd.DataFrame()
+        self.fuzzy_names: pd.DataFrame = pd.DataFrame()
     
-    @st.cache_data(ttl=AppConstants.CACHE_TTL_SECONDS)
-    def fetch(_self) -> Optional[pd.DataFrame]:
-        try:
-            # Membaca data mentah dari Spreadsheet
-            df = pd.read_csv(_self.url)
-            df.columns = df.columns.str.strip()
-            
-            # Standarisasi judul kolom "Nama"
-            if 'Nama' in df.columns:
-                df = df.rename(columns={'Nama': AppConstants.COL_PERSON_NAME})
-                
-            return _self.transform(df)
-        except Exception as e:
-            st.error(f"❌ Error saat mengambil data: {str(e)}")
-            return None
+    def fetch(self) -> Optional[pd.DataFrame]:
+        """
+        Download and transform the sheet; returns the previous frame (same
+        object) without parsing when the content is unchanged or the download fails.
+        Runs on the refresher thread, so errors go to last_error instead of st.error.
+        """
+        return self._fetch_sheet(self._parse, "❌ Error saat mengambil data: ")
+    
+    def _parse(self, body: bytes) -> pd.DataFrame:
+        # Membaca data mentah dari Spreadsheet
+        df = pd.read_csv(io.BytesIO(body))
+        df.columns = df.columns.str.strip()
+        
+        # Standarisasi judul kolom "Nama"
+        if 'Nama' in df.columns:
+            df = df.rename(columns={'Nama': AppConstants.COL_PERSON_NAME})
+        
+        raw_pivot_bytes = PerformanceMonitor.memory_usage(df)
+        self.unmatched_names = NameCanonicalizer.unmatched_report(df, AppConstants.COL_PERSON_NAME)
+        self.fuzzy_names = NameCanonicalizer.fuzzy_report(df, AppConstants.COL_PERSON_NAME)
+        flat = self._ingest(df)
+        # Ukuran pivot mentah dari CSV vs tabel flat compact yang disimpan (deep)
+        self.memory_report = {
+            'rows': len(flat), 'raw_pivot_bytes': raw_pivot_bytes,
+            'flat_bytes': PerformanceMonitor.memory_usage(flat)
+        }
+        return flat
+    
+    def _ingest(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Incremental transform of the pivot: only date columns whose content hash
+        changed (or that were added/removed) are melted again and spliced into
+        the previous flat frame. Sets last_changes for the change feed.
+        """
+        previous = self._cache
+        if not self.validate(df) or df.columns.duplicated().any():
+            return self._full_ingest(df, {})
+        
+        # Hash per kolom tanggal (ikut hash kolom nama, jadi perubahan baris = semua kolom berubah)
+        date_columns = [col for col in df.columns if col != AppConstants.COL_PERSON_NAME]
+        name_bytes = pd.util.hash_array(df[AppConstants.COL_PERSON_NAME].to_numpy(dtype=object)).tobytes()
+        # Satu panggilan hash_array untuk semua sel, lalu dipotong per kolom
+        cell_hashes = pd.util.hash_array(df[date_columns].to_numpy(dtype=object).ravel(order='F'))
+        cell_hashes = cell_hashes.reshape(len(date_columns), len(df))
+        column_hashes = {
+            col: hashlib.sha1(name_bytes + cell_hashes[i].tobytes()).hexdigest()
+            for i, col in enumerate(date_columns)
+        }
+        
+        if previous is None or not self._column_hashes:
+            return self._full_ingest(df, column_hashes)
+        
+        dirty_columns = (
+            {col for col, digest in column_hashes.items() if self._column_hashes.get(col) != digest}
+            | (set(self._column_hashes) - set(column_hashes))
+        )
+        if not dirty_columns:
+            self._column_hashes = column_hashes
+            self.last_changes = AttendanceChangeSet(frozenset(), frozenset())
+            return previous
+        
+        # Kolom -> hari; beberapa kolom bisa jatuh di hari yang sama, jadi unit ulangnya per hari
+        removed_columns = sorted(set(self._column_hashes) - set(column_hashes))
+        all_columns = date_columns + removed_columns
+        day_of = dict(zip(all_columns, pd.to_datetime(pd.Series(all_columns), errors='coerce').dt.date))
+        if any(pd.isna(day_of[col]) for col in dirty_columns):
+            # Judul kolom bukan tanggal standar: ulang penuh supaya hasil tetap sama persis
+            return self._full_ingest(df, column_hashes)
+        dirty_days = {day_of[col] for col in dirty_columns}
+        redo_columns = [col for col in date_columns if day_of[col] in dirty_days]
+        
+        fresh = self.transform(df[[AppConstants.COL_PERSON_NAME] + redo_columns])
+        previous_days = DatePartitionIndex._day_keys(previous)
+        dirty_keys = np.array(sorted(dirty_days), dtype='datetime64[D]')
+        kept = previous[~np.isin(previous_days, dirty_keys)]
+        
+        parts = [part for part in (kept, fresh) if not part.empty]
+        if not parts:
+            flat = fresh
+        elif len(parts) == 1:
+            flat = parts[0].reset_index(drop=True)
+        else:
+            # Dua bagian sudah urut dan harinya tidak tumpang tindih: cukup urut stabil per hari
+            flat = pd.concat(parts, ignore_index=True)
+            order = np.argsort(DatePartitionIndex._day_keys(flat), kind='stable')
+            flat = flat.iloc[order].reset_index(drop=True)
+        
+        self._column_hashes = column_hashes
+        self.last_changes = AttendanceChangeSet(
+            frozenset(dirty_days), self._changed_keys(previous[np.isin(previous_days, dirty_keys)], fresh)
+        )
+        return flat
+    
+    def _full_ingest(self, df: pd.DataFrame, column_hashes: Dict[str, str]) -> pd.DataFrame:
+        flat = self.transform(df)
+        self._column_hashes = column_hashes
+        self.last_changes = AttendanceChangeSet(frozenset(), frozenset(), full_reload=True)
+        return flat
+    
+    @staticmethod
+    def _changed_keys(old: pd.DataFrame, new: pd.DataFrame) -> FrozenSet[Tuple[str, datetime.date]]:
+        """(Person Name, date) pairs whose set of punches differs between old and new rows."""
+        def punches(frame: pd.DataFrame) -> Dict[Tuple[str, datetime.date], Tuple]:
+            if frame.empty:
+                return {}
+            grouped = frame.groupby(
+                [AppConstants.COL_PERSON_NAME, AppConstants.COL_DAY_NUMBER], observed=True
+            )[AppConstants.COL_EVENT_TIME]
+            return {
+                (name, AttendanceSchema.to_dates([day])[0]): punches
+                for (name, day), punches in grouped.agg(tuple).items()
+            }
+        
+        before, after = punches(old), punches(new)
+        return frozenset(key for key in before.keys() | after.keys() if before.get(key) != after.get(key))
 
     def validate(self, df: pd.DataFrame) -> bool:
         return AppConstants.COL_PERSON_NAME in df.columns
@@ -323,51 +938,79 @@ class AttendanceRepository(DataRepository):
         # ==========================================
         # 0. PENYELAMAT JIKA DATA KOSONG
         # ==========================================
-        empty_schema = pd.DataFrame(columns=[
-            AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME, 
-            'Tanggal', 'Waktu', 'Jam', 'Menit', 'Hari'
-        ])
+        empty_schema = AttendanceSchema.empty()
 
         if df.empty:
             return empty_schema
 
         # =================================================================
-        # 0.5 TRANSLATOR NAMA (MESIN -> DASHBOARD) [FITUR BARU]
-        # Mengubah nama panjang dari mesin menjadi singkatan sesuai kemauanmu
+        # 0.5 TRANSLATOR NAMA (MESIN -> DASHBOARD)
+        # Alias, beda spasi/kapital, dan salah ketik kecil dipetakan ke nama
+        # registry (sekali per nama unik); lihat NameCanonicalizer
         # =================================================================
-        name_corrections = {
-            "Doni Eka Satria": "Doni Eka",
-            "Maikel Renato Syafaruddin": "Maikel R",
-            "Hamzah M. Ali Gani": "Hamzah M Ali Gani",
-            "Aditya Sugiantoro Abbas": "Aditya Sugiantoro A",
-            "Muhamad Usman": "M.Usman",
-            "M Akbar D Patty": "M.Akbar Patty",
-            "Daniel Freski Wangka": "Daniel Freski W",
-            "Fandi M. Naser": "Fandi M Naser",
-            "Agung Fadjriansyah Ano": "Agung F",
-            "Deni Hendri Bobode": "Deni Hendri",
-            "Muhammad Rifai": "M Rifai",
-            "Idrus Arsad, SH": "Idrus Arsad"
-        }
-        df[AppConstants.COL_PERSON_NAME] = df[AppConstants.COL_PERSON_NAME].replace(name_corrections)
+        df = df.assign(**{
+            AppConstants.COL_PERSON_NAME: NameCanonicalizer.canonicalize(df[AppConstants.COL_PERSON_NAME])
+        })
 
         # ==========================================
         # 1. BUANG DATA YANG TIDAK PERLU
+        # Nama yang tidak dikenal -> AttendanceRepository.unmatched_names
         # ==========================================
-        valid_employees = DivisionRegistry.get_all_members()
-        df = df[df[AppConstants.COL_PERSON_NAME].isin(valid_employees)].copy()
+        df = df[df[AppConstants.COL_PERSON_NAME].notna()]
 
         if df.empty:
             return empty_schema
 
         # ==========================================
-        # 2. PUTAR TABEL (UNPIVOT)
+        # 2. PUTAR TABEL PER BLOK KOLOM (STREAMING)
+        # Sheet bertambah satu kolom per hari; melt/explode seluruh riwayat
+        # sekaligus membuat frame sementara raksasa. Per blok, hanya hasil
+        # ringkasnya yang disimpan, jadi memori sementara tidak ikut tumbuh.
         # ==========================================
         date_columns = [col for col in df.columns if col != AppConstants.COL_PERSON_NAME]
         
         if not date_columns:
             return empty_schema
         
+        parts = []
+        datetime_format = None
+        block_size = AppConstants.INGEST_COLUMN_BLOCK
+        for start in range(0, len(date_columns), block_size):
+            block = date_columns[start:start + block_size]
+            event_strings = self._explode_block(df, block)
+            if event_strings is None:
+                continue
+            if datetime_format is None:
+                # Format ditebak sekali dari nilai pertama (sama seperti to_datetime
+                # atas seluruh data), lalu dipakai untuk semua blok
+                datetime_format = guess_datetime_format(event_strings[AppConstants.COL_EVENT_TIME].iat[0]) or 'mixed'
+            event_strings[AppConstants.COL_EVENT_TIME] = pd.to_datetime(
+                event_strings[AppConstants.COL_EVENT_TIME], format=datetime_format, errors='coerce'
+            )
+            event_strings = event_strings.dropna(subset=[AppConstants.COL_EVENT_TIME])
+            if event_strings.empty:
+                continue
+            parts.append(AttendanceSchema.compact(
+                event_strings[AppConstants.COL_PERSON_NAME].to_numpy(),
+                event_strings[AppConstants.COL_EVENT_TIME].to_numpy()
+            ))
+        
+        if not parts:
+            return empty_schema
+        
+        # Skema ringkas (nama kategori, hari & menit int32), lalu urut per
+        # (Tanggal, Nama, Jam) supaya satu hari = satu potongan baris.
+        # Tanggal/Waktu/Jam/Menit/Hari dibuat saat perlu lewat AttendanceSchema.expand
+        new_df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        return DatePartitionIndex.sort_frame(new_df)
+    
+    @staticmethod
+    def _explode_block(df: pd.DataFrame, date_columns: List[str]) -> Optional[pd.DataFrame]:
+        """
+        Unpivot one block of date columns into (Person Name, 'YYYY-MM-DD HH:MM:00')
+        rows, in the same row order a melt of the whole sheet would give.
+        None when the block has no punches.
+        """
         df_melted = pd.melt(
             df, 
             id_vars=[AppConstants.COL_PERSON_NAME], 
@@ -381,46 +1024,96 @@ class AttendanceRepository(DataRepository):
         df_melted = df_melted[~df_melted['Jam_Raw'].astype(str).str.contains(r'^[-,\s]+$')]
 
         # ==========================================
-        # 3. PECAH JAM YANG NUMPUK
+        # 3. PECAH JAM YANG NUMPUK (VECTORIZED)
+        # Satu sel bisa berisi banyak jam ("07:01,12:03\n13:00"),
+        # dipecah sekaligus untuk seluruh kolom pakai split + explode.
         # ==========================================
-        expanded_data = []
-        for _, row in df_melted.iterrows():
-            nama = row[AppConstants.COL_PERSON_NAME]
-            tgl = row['Tanggal_Absen']
-            
-            raw_text = str(row['Jam_Raw']).replace('\n', ',').replace('\r', ',')
-            all_punches = raw_text.split(',')
-            
-            for punch in all_punches:
-                punch = punch.strip()
-                if punch and punch != '-' and punch != '-,-':
-                    event_time_str = f"{tgl} {punch}:00"
-                    expanded_data.append({
-                        AppConstants.COL_PERSON_NAME: nama,
-                        AppConstants.COL_EVENT_TIME: event_time_str
-                    })
-        
+        punches = (
+            df_melted['Jam_Raw']
+            .astype(str)
+            .str.replace('\n', ',', regex=False)
+            .str.replace('\r', ',', regex=False)
+            .str.split(',')
+        )
+        df_exploded = pd.DataFrame({
+            AppConstants.COL_PERSON_NAME: df_melted[AppConstants.COL_PERSON_NAME],
+            'Tanggal_Absen': df_melted['Tanggal_Absen'].astype(str),
+            'Punch': punches,
+        }).explode('Punch', ignore_index=True)
+
+        # Jam yang sama muncul ribuan kali -> strip cukup sekali per nilai unik
+        punch_codes, punch_values = pd.factorize(df_exploded['Punch'])
+        df_exploded['Punch'] = pd.Index(punch_values).str.strip().take(punch_codes).to_numpy()
+
+        df_exploded = df_exploded[
+            df_exploded['Punch'].notna() & ~df_exploded['Punch'].isin(['', '-'])
+        ]
+
         # ==========================================
         # 4. KEMBALIKAN KE BENTUK ASLI WEBSITE
         # ==========================================
-        new_df = pd.DataFrame(expanded_data)
-        
-        if new_df.empty: 
-            return empty_schema
+        if df_exploded.empty:
+            return None
+
+        return pd.DataFrame({
+            AppConstants.COL_PERSON_NAME: df_exploded[AppConstants.COL_PERSON_NAME].values,
+            AppConstants.COL_EVENT_TIME: (
+                df_exploded['Tanggal_Absen'] + ' ' + df_exploded['Punch'] + ':00'
+            ).values,
+        })
 
-        new_df[AppConstants.COL_EVENT_TIME] = pd.to_datetime(new_df[AppConstants.COL_EVENT_TIME], errors='coerce')
-        new_df = new_df.dropna(subset=[AppConstants.COL_EVENT_TIME])
-        
-        if new_df.empty:
-            return empty_schema
-        
-        new_df['Tanggal'] = new_df[AppConstants.COL_EVENT_TIME].dt.date
-        new_df['Waktu'] = new_df[AppConstants.COL_EVENT_TIME].dt.time
-        new_df['Jam'] = new_df[AppConstants.COL_EVENT_TIME].dt.hour
-        new_df['Menit'] = new_df[AppConstants.COL_EVENT_TIME].dt.minute
-        new_df['Hari'] = new_df[AppConstants.COL_EVENT_TIME].dt.day_name()
-        
-        return new_df
+
+class StatusCalendar:
+    """
+    Date-keyed status lookup compiled once per fetch: {date: {employee: status}}.
+    Rows with an end date (COL_END_DATE) are intervals and are expanded to
+    every day they cover, at most MAX_STATUS_INTERVAL_DAYS days, so a
+    malformed or open-ended end date cannot blow up memory. When a name
+    appears twice on one day, the later sheet row wins, matching the old
+    per-date Series -> dict conversion.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        starts = pd.to_datetime(df[AppConstants.COL_DATE], errors='coerce').to_numpy().astype('datetime64[D]')
+        if AppConstants.COL_END_DATE in df.columns:
+            ends = pd.to_datetime(df[AppConstants.COL_END_DATE], errors='coerce').to_numpy().astype('datetime64[D]')
+            ends = np.where(np.isnat(ends) | (ends < starts), starts, ends)
+        else:
+            ends = starts
+        
+        valid = ~np.isnat(starts)
+        starts, ends = starts[valid], ends[valid]
+        # Panjang interval dibatasi: tahun salah ketik (2205, 9999) tidak memakan memori
+        ends = np.minimum(ends, starts + np.timedelta64(AppConstants.MAX_STATUS_INTERVAL_DAYS - 1, 'D'))
+        
+        names = df[AppConstants.COL_EMPLOYEE_NAME].to_numpy()[valid]
+        statuses = df[AppConstants.COL_STATUS].to_numpy()[valid]
+        
+        # Interval -> satu baris per hari (urutan baris sheet tetap terjaga)
+        lengths = (ends - starts).astype(np.int64) + 1
+        row_ids = np.repeat(np.arange(len(starts)), lengths)
+        day_offsets = np.arange(len(row_ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        days = starts[row_ids] + day_offsets.astype('timedelta64[D]')
+        
+        order = np.argsort(days, kind='stable')
+        days, row_ids = days[order], row_ids[order]
+        self._days = np.unique(days)
+        bounds = np.searchsorted(days, self._days, side='left').tolist() + [len(days)]
+        
+        self._by_date: Dict[datetime.date, Dict[str, str]] = {}
+        for day, lo, hi in zip(self._days.astype(object), bounds[:-1], bounds[1:]):
+            rows = row_ids[lo:hi]
+            self._by_date[day] = dict(zip(names[rows], statuses[rows]))
+    
+    def for_date(self, target_date: datetime.date) -> Dict[str, str]:
+        """Status per employee on one day (shared; copy before modifying)."""
+        return self._by_date.get(target_date, {})
+    
+    def between(self, start_date: datetime.date, end_date: datetime.date) -> Dict[datetime.date, Dict[str, str]]:
+        """All days in [start_date, end_date] that have at least one status."""
+        lo = np.searchsorted(self._days, np.datetime64(start_date, 'D'), side='left')
+        hi = np.searchsorted(self._days, np.datetime64(end_date, 'D'), side='right')
+        return {day: self._by_date[day] for day in self._days[lo:hi].astype(object)}
 
 
 class StatusRepository(DataRepository):
@@ -430,23 +1123,26 @@ class StatusRepository(DataRepository):
     
     def __init__(self, url: str):
         self.url = url
+        self.source = ConditionalCsvSource(url, 'status')
+        self._cache: Optional[pd.DataFrame] = None
+        self._cache_hash: Optional[str] = None
+        self._cache_time: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[datetime] = None
     
-    @st.cache_data(ttl=AppConstants.CACHE_TTL_SECONDS)
-    def fetch(_self) -> Optional[pd.DataFrame]:
-        """Fetch status data from Google Sheets."""
-        try:
-            df = pd.read_csv(_self.url)
-            df = df.rename(columns=lambda x: x.strip())
-            
-            if not _self.validate(df):
-                st.warning("⚠️ Status data validation failed")
-                return None
-            
-            return _self.transform(df)
-            
-        except Exception as e:
-            st.warning(f"⚠️ Failed to fetch status data: {str(e)}")
+    def fetch(self) -> Optional[pd.DataFrame]:
+        """Fetch status data from Google Sheets (unchanged content or failed download -> previous frame)."""
+        return self._fetch_sheet(self._parse, "⚠️ Failed to fetch status data: ")
+    
+    def _parse(self, body: bytes) -> Optional[pd.DataFrame]:
+        df = pd.read_csv(io.BytesIO(body))
+        df = df.rename(columns=lambda x: x.strip())
+        
+        if not self.validate(df):
+            self.last_error = "⚠️ Status data validation failed"
             return None
+        
+        return self.transform(df)
     
     def validate(self, df: pd.DataFrame) -> bool:
         """Validate status data structure."""
@@ -462,15 +1158,15 @@ class StatusRepository(DataRepository):
             .str.strip()
         )
         
-        # Parse dates
-        df[AppConstants.COL_DATE] = pd.to_datetime(
-            df[AppConstants.COL_DATE],
-            format='mixed',
-            dayfirst=False,
-            errors='coerce'
-        ).dt.date # Ensure date format consistency
-        
-        df['Tanggal_Str'] = pd.to_datetime(df[AppConstants.COL_DATE]).dt.strftime(AppConstants.DATE_FORMAT)
+        # Parse dates (sekali saja; kolom tanggal selesai opsional)
+        for col in (AppConstants.COL_DATE, AppConstants.COL_END_DATE):
+            if col in df.columns:
+                df[col] = pd.to_datetime(
+                    df[col],
+                    format='mixed',
+                    dayfirst=False,
+                    errors='coerce'
+                ).dt.date # Ensure date format consistency
         
         # Standardize status text
         df[AppConstants.COL_STATUS] = (
@@ -483,10 +1179,503 @@ class StatusRepository(DataRepository):
         return df
 
 
+@dataclass(frozen=True)
+class DataSnapshot:
+    """
+    One refresh of both sheets; never modified after it is published.
+    Handed out by reference (no pickling / copying per rerun); version
+    increases by one with every published snapshot.
+    """
+    version: int
+    attendance: Optional[DatePartitionIndex]
+    statuses: Optional[StatusCalendar]
+    loaded_at: datetime
+    checked_at: datetime  # Terakhir semua sheet berhasil dicek ke sumber (isi bisa sama dengan loaded_at)
+
+
+class SharedDataService:
+    """
+    Process-wide data layer shared by every Streamlit session.
+    A daemon thread refreshes both sheets on a schedule, concurrent callers
+    coalesce onto a single in-flight fetch (single-flight), and readers only
+    ever see the latest published DataSnapshot.
+    """
+    
+    def __init__(
+        self,
+        attendance_repo: AttendanceRepository,
+        status_repo: Optional[StatusRepository],
+        refresh_interval: float = AppConstants.CACHE_TTL_SECONDS
+    ):
+        self.attendance_repo = attendance_repo
+        self.status_repo = status_repo
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._inflight: Optional[threading.Event] = None
+        self._snapshot: Optional[DataSnapshot] = None
+        self._sources: Tuple[Optional[pd.DataFrame], ...] = (None, None)
+        self._version = 0
+        self._change_log: deque = deque(maxlen=AppConstants.CHANGE_FEED_LENGTH)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Dua sheet diunduh paralel: cold load ~ max(t_attendance, t_status), bukan jumlahnya
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sheet-fetch")
+        self.monitor = PerformanceMonitor()
+        # Hasil slot per (orang, tanggal) bertahan lintas refresh & session
+        self.slot_cache = SlotResultCache()
+        self.export_cache = ExportCache()
+        self.export_jobs = ExportJobQueue(self.export_cache)
+    
+    def start(self) -> None:
+        """Start the background refresher (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name="sheet-refresher", daemon=True
+            )
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background refresher after its current cycle."""
+        self._stop.set()
+    
+    def snapshot(self) -> Optional[DataSnapshot]:
+        """
+        Latest snapshot, returned immediately (stale-while-revalidate).
+        Only the very first caller waits for the initial load; an overdue
+        snapshot triggers a background revalidation instead of blocking.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.refresh()
+        if (datetime.now() - snapshot.checked_at).total_seconds() > 2 * self.refresh_interval:
+            self.refresh_async()
+        return snapshot
+    
+    def refresh_async(self) -> None:
+        """Start a refresh on a worker thread unless one is already in flight."""
+        if self._inflight is None:
+            threading.Thread(target=self._refresh_quietly, name="sheet-revalidate", daemon=True).start()
+    
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            pass  # Coba lagi di siklus berikutnya; snapshot lama tetap dipakai
+    
+    def refresh(self) -> Optional[DataSnapshot]:
+        """
+        Reload both sheets and publish a new snapshot.
+        If a refresh is already running, wait for it instead of starting another.
+        """
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = threading.Event()
+                is_leader = True
+            else:
+                is_leader = False
+        
+        if not is_leader:
+            inflight.wait()
+            return self._snapshot
+        
+        try:
+            self._snapshot = self._load()
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+        return self._snapshot
+    
+    @property
+    def version(self) -> int:
+        """Version of the latest published snapshot (0 = nothing loaded yet)."""
+        return self._version
+    
+    def _timed_fetch(self, name: str, repo: Optional[DataRepository]) -> Optional[pd.DataFrame]:
+        if repo is None:
+            return None
+        self.monitor.start_timer(f"fetch_{name}")
+        try:
+            return repo.fetch()
+        finally:
+            self.monitor.end_timer(f"fetch_{name}")
+    
+    def _load(self) -> DataSnapshot:
+        self.monitor.start_timer("fetch_total")
+        attendance_future = self._executor.submit(self._timed_fetch, "attendance", self.attendance_repo)
+        status_future = self._executor.submit(self._timed_fetch, "status", self.status_repo)
+        df_attendance, df_status = attendance_future.result(), status_future.result()
+        self.monitor.end_timer("fetch_total")
+        
+        # Download gagal juga mengembalikan frame lama: itu bukan revalidasi
+        repos = [repo for repo in (self.attendance_repo, self.status_repo) if repo is not None]
+        checked_ok = not any(getattr(repo, 'last_error', None) for repo in repos)
+        previous = self._snapshot
+        
+        # Repository mengembalikan objek yang sama jika isi sheet tidak berubah
+        sources = (df_attendance, df_status)
+        if previous is not None and all(a is b for a, b in zip(sources, self._sources)):
+            return dataclasses.replace(previous, checked_at=datetime.now()) if checked_ok else previous
+        # last_changes milik ingest sebelumnya jika hanya sheet status yang berubah
+        if df_attendance is not None and df_attendance is self._sources[0]:
+            changes = AttendanceChangeSet(frozenset(), frozenset())
+        elif df_attendance is not None:
+            changes = getattr(self.attendance_repo, 'last_changes', None)
+        else:
+            changes = None
+        self._sources = sources
+        
+        self._version += 1  # Hanya leader single-flight yang sampai di sini
+        self._change_log.append((self._version, changes))
+        return DataSnapshot(
+            version=self._version,
+            attendance=DatePartitionIndex(df_attendance) if df_attendance is not None else None,
+            statuses=StatusCalendar(df_status) if df_status is not None else None,
+            loaded_at=datetime.now(),
+            checked_at=datetime.now() if checked_ok else (previous.checked_at if previous is not None else datetime.min),
+        )
+    
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self._refresh_quietly()
+    
+    def changes_since(
+        self, version: int, until: Optional[int] = None
+    ) -> Optional[FrozenSet[Tuple[str, datetime.date]]]:
+        """
+        Change feed: (Person Name, date) keys touched by every snapshot newer than
+        version (up to and including until, default the latest). None means
+        "recompute everything" (full reload or feed too short).
+        """
+        until = self._version if until is None else until
+        return self._changes_in(list(self._change_log), version, until)
+    
+    @staticmethod
+    def _changes_in(
+        log: List[Tuple[int, Optional[AttendanceChangeSet]]], version: int, until: int
+    ) -> Optional[FrozenSet[Tuple[str, datetime.date]]]:
+        # log adalah salinan _change_log: refresher bisa menambah entri kapan saja
+        if version >= until:
+            return frozenset()
+        if not log or log[0][0] > version + 1:
+            return None  # Feed tidak menjangkau versi itu lagi
+        entries = [changes for entry_version, changes in log if version < entry_version <= until]
+        if any(changes is None or changes.full_reload for changes in entries):
+            return None
+        return frozenset().union(*(changes.keys for changes in entries))
+    
+    def range_version(self, start_date: datetime.date, end_date: datetime.date, as_of: int) -> int:
+        """
+        Oldest snapshot version whose attendance rows for [start_date, end_date]
+        are the same as in snapshot as_of, read from the change feed. Export keys
+        built on it survive refreshes that only touched other dates.
+        """
+        log = list(self._change_log)
+        versions = [entry_version for entry_version, _ in log if entry_version <= as_of]
+        for version in reversed(versions):
+            changed = self._changes_in(log, version - 1, version)
+            if changed is None or any(start_date <= day <= end_date for _, day in changed):
+                return version
+        # Tidak ada perubahan di range sepanjang feed: isinya sama dengan versi sebelum entri tertua
+        return versions[0] - 1 if versions else as_of
+    
+    def health(self) -> Dict[str, Any]:
+        """
+        Freshness summary for the sidebar (never triggers a fetch).
+        age_seconds counts from the last time every sheet answered successfully;
+        loading means the first load has not published a snapshot yet.
+        """
+        snapshot = self._snapshot
+        repos = [repo for repo in (self.attendance_repo, self.status_repo) if repo is not None]
+        errors = [repo.last_error for repo in repos if getattr(repo, 'last_error', None)]
+        successes = [getattr(repo, 'last_success', None) for repo in repos]
+        last_success = None if None in successes else min(successes)
+        age = (datetime.now() - last_success).total_seconds() if last_success else None
+        return {
+            'loading': snapshot is None,
+            'loaded': snapshot is not None and snapshot.attendance is not None,
+            'version': snapshot.version if snapshot is not None else 0,
+            'last_success': last_success,
+            'age_seconds': age,
+            'stale': bool(errors) or age is None or age > AppConstants.STALE_AFTER_SECONDS,
+            'errors': errors,
+            'fetch_seconds': self.monitor.get_summary(),
+            'memory': dict(getattr(self.attendance_repo, 'memory_report', {})),
+            'unmatched_names': getattr(self.attendance_repo, 'unmatched_names', pd.DataFrame()),
+            'fuzzy_names': getattr(self.attendance_repo, 'fuzzy_names', pd.DataFrame()),
+        }
+    
+    def attendance_index(self) -> Optional[DatePartitionIndex]:
+        """Date partition index of the current snapshot (read-only)."""
+        snapshot = self.snapshot()
+        return snapshot.attendance if snapshot is not None else None
+    
+    def status_calendar(self) -> Optional[StatusCalendar]:
+        """Status calendar of the current snapshot (read-only)."""
+        snapshot = self.snapshot()
+        return snapshot.statuses if snapshot is not None else None
+
+
+@st.cache_resource
+def get_data_service() -> SharedDataService:
+    """The single SharedDataService of this server process (all sessions share it)."""
+    service = SharedDataService(
+        AttendanceRepository(DataSourceConfig.ATTENDANCE_SHEET_URL),
+        StatusRepository(DataSourceConfig.STATUS_SHEET_URL),
+    )
+    service.start()
+    return service
+
+
 # ================================================================================
 # SECTION 3: BUSINESS LOGIC LAYER (SERVICE CLASSES)
 # ================================================================================
 
+class ShiftRuleTable:
+    """
+    Declarative shift rule table compiled into minute-of-day lookup arrays.
+    Each (shift, weekday) gets 1440-entry arrays for slot label and lateness,
+    so classifying a punch is a single array index.
+    """
+
+    SHIFTS = ("SHIFT 1", "SHIFT 2")
+    SLOTS = ("", "Pagi", "Siang_1", "Siang_2", "Sore")
+    MINUTES_PER_DAY = 24 * 60
+    FRIDAY = 4
+    NON_FRIDAY = (0, 1, 2, 3, 5, 6)
+
+    # Urutan = prioritas (seperti rantai if/elif): slot pertama yang cocok menang.
+    # Sore sengaja paling akhir karena dipakai untuk log terakhir (>= 16:00).
+    RULES: Tuple[SlotRule, ...] = (
+        # === SHIFT 1 ===
+        SlotRule("SHIFT 1", "Pagi", time(0, 0, 0), AppConstants.SLOT_PAGI_END,
+                 late_after=AppConstants.S1_LATE_TOLERANCE),
+        SlotRule("SHIFT 1", "Siang_1", AppConstants.SLOT_S1_BREAK_OUT_START, AppConstants.SLOT_S1_BREAK_OUT_END),
+        SlotRule("SHIFT 1", "Siang_2", AppConstants.S1_BREAK_IN_START, AppConstants.S1_BREAK_IN_END,
+                 late_after=AppConstants.S1_BREAK_IN_END),
+        SlotRule("SHIFT 1", "Sore", AppConstants.SLOT_SORE_START, time(23, 59, 59)),
+
+        # === SHIFT 2 ===
+        SlotRule("SHIFT 2", "Pagi", time(0, 0, 0), AppConstants.SLOT_PAGI_END,
+                 late_after=AppConstants.S2_LATE_TOLERANCE),
+        # Jumat: istirahat ikut Shift 1
+        SlotRule("SHIFT 2", "Siang_1", AppConstants.SLOT_S1_BREAK_OUT_START, AppConstants.SLOT_S1_BREAK_OUT_END,
+                 weekdays=(FRIDAY,)),
+        SlotRule("SHIFT 2", "Siang_2", AppConstants.S1_BREAK_IN_START, AppConstants.S1_BREAK_IN_END,
+                 weekdays=(FRIDAY,), late_after=AppConstants.S1_BREAK_IN_END),
+        # Normal: Senin-Kamis, Sabtu-Minggu
+        SlotRule("SHIFT 2", "Siang_1", AppConstants.SLOT_S2_BREAK_OUT_START, AppConstants.SLOT_S2_BREAK_OUT_END,
+                 weekdays=NON_FRIDAY),
+        SlotRule("SHIFT 2", "Siang_2", AppConstants.S2_NORM_BREAK_IN_START, AppConstants.S2_NORM_BREAK_IN_END,
+                 weekdays=NON_FRIDAY, late_after=AppConstants.S2_NORM_BREAK_IN_END),
+        SlotRule("SHIFT 2", "Sore", AppConstants.SLOT_SORE_START, time(23, 59, 59)),
+    )
+
+    # Compiled tables (built once, lazily)
+    version: Optional[str] = None
+    slot_codes: Optional[np.ndarray] = None      # [shift, weekday, minute] -> index into SLOTS
+    in_window: Optional[np.ndarray] = None       # [slot, shift, weekday, minute] -> bool
+    late: Optional[np.ndarray] = None            # [slot, shift, weekday, minute] -> bool
+    time_range_codes: Optional[np.ndarray] = None  # [minute] -> index into TimeRanges (-1 = UNKNOWN)
+
+    @staticmethod
+    def to_minute(value: time) -> int:
+        """Convert a time object to its minute of day (seconds are truncated)."""
+        return value.hour * 60 + value.minute
+
+    @classmethod
+    def compile(cls) -> None:
+        """Compile RULES and TimeRanges into lookup arrays (idempotent)."""
+        if cls.version is not None:
+            return
+
+        n_slots, n_shifts = len(cls.SLOTS), len(cls.SHIFTS)
+        slot_codes = np.zeros((n_shifts, 7, cls.MINUTES_PER_DAY), dtype=np.uint8)
+        in_window = np.zeros((n_slots, n_shifts, 7, cls.MINUTES_PER_DAY), dtype=bool)
+        late = np.zeros((n_slots, n_shifts, 7, cls.MINUTES_PER_DAY), dtype=bool)
+        minute_axis = np.arange(cls.MINUTES_PER_DAY)
+
+        for rule in cls.RULES:
+            shift_idx = cls.SHIFTS.index(rule.shift)
+            slot_idx = cls.SLOTS.index(rule.slot)
+            window = (minute_axis >= cls.to_minute(rule.start)) & (minute_axis <= cls.to_minute(rule.end))
+            for weekday in rule.weekdays:
+                unclaimed = slot_codes[shift_idx, weekday] == 0
+                slot_codes[shift_idx, weekday, window & unclaimed] = slot_idx
+                in_window[slot_idx, shift_idx, weekday] |= window
+                if rule.late_after is not None:
+                    late[slot_idx, shift_idx, weekday] = minute_axis > cls.to_minute(rule.late_after)
+
+        time_range_codes = np.full(cls.MINUTES_PER_DAY, -1, dtype=np.int8)
+        for idx, time_range in reversed(list(enumerate(TimeRanges))):
+            start = cls.to_minute(time.fromisoformat(time_range.start_time.zfill(8)))
+            end = cls.to_minute(time.fromisoformat(time_range.end_time.zfill(8)))
+            time_range_codes[start:end + 1] = idx
+
+        for table in (slot_codes, in_window, late, time_range_codes):
+            table.setflags(write=False)
+
+        cls.slot_codes, cls.in_window, cls.late = slot_codes, in_window, late
+        cls.time_range_codes = time_range_codes
+        cls.version = hashlib.sha1(
+            repr((cls.RULES, [tr.value for tr in TimeRanges])).encode()
+        ).hexdigest()[:12]
+
+    @classmethod
+    def slot_index(cls, slot: str) -> int:
+        """Index of a slot label in SLOTS."""
+        return cls.SLOTS.index(slot)
+
+    @classmethod
+    def parse_minute(cls, value: Optional[str]) -> Optional[int]:
+        """Parse an 'HH:MM' string to minute of day, None if empty/invalid."""
+        if not value:
+            return None
+        try:
+            parsed = datetime.strptime(value, AppConstants.TIME_FORMAT)
+        except (ValueError, TypeError):
+            return None
+        return parsed.hour * 60 + parsed.minute
+
+    @classmethod
+    def parse_minutes(cls, values: pd.Series) -> np.ndarray:
+        """
+        Parse a Series of 'HH:MM' strings to minute of day (-1 if empty/invalid).
+        Each distinct value is parsed once, the rest is integer indexing.
+        """
+        codes, uniques = pd.factorize(values.astype(object))
+        parsed = [cls.parse_minute(value) for value in uniques]
+        unique_minutes = np.array([-1 if m is None else m for m in parsed] + [-1], dtype=np.int64)
+        return unique_minutes[codes]
+
+
+class SlotResultCache:
+    """
+    Bounded LRU of per-(person, date) slot results.
+    The key is a 128-bit digest of the day's sorted punch minutes, its weekday
+    and ShiftRuleTable.version, so an edited rule table never serves old
+    results. Digests, lookups and inserts are computed for a whole batch at
+    once; eviction drops the least recently used entries in bulk.
+    """
+
+    N_SLOTS = 4  # Pagi, Siang_1, Siang_2, Sore
+    _SEEDS = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F))
+
+    def __init__(self, max_entries: int = AppConstants.SLOT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._checks = np.empty(0, dtype=np.uint64)   # Digest kedua, verifikasi tabrakan key
+        self._values = np.empty((0, self.N_SLOTS), dtype=np.uint16)
+        self._last_used = np.empty(0, dtype=np.int64)
+        self._index = pd.Index(self._keys)
+        self._tick = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _mix(values: np.ndarray) -> np.ndarray:
+        """splitmix64 finalizer (uint64 arithmetic wraps around)."""
+        values = values.astype(np.uint64)
+        with np.errstate(over='ignore'):
+            values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+    @classmethod
+    def digests(
+        cls, minutes: np.ndarray, group_id: np.ndarray, n_groups: int, weekday: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Two independent 64-bit digests per group of (rule version, weekday, punch minutes)."""
+        ShiftRuleTable.compile()
+        rule_salt = np.uint64(int(ShiftRuleTable.version, 16))
+
+        # Daftar punch terurut = multiset menitnya, jadi cukup jumlah hash per menit
+        # (tidak perlu sort per grup)
+        counts = np.bincount(group_id, minlength=n_groups).astype(np.uint64)
+        header = (counts << np.uint64(3)) | weekday.astype(np.uint64)
+        punches = minutes.astype(np.uint64)
+
+        result = []
+        for seed in cls._SEEDS:
+            body = np.zeros(n_groups, dtype=np.uint64)
+            np.add.at(body, group_id, cls._mix(punches ^ seed))
+            result.append(cls._mix(body ^ cls._mix(header ^ rule_salt ^ seed)))
+        return result[0], result[1]
+
+    def get_or_compute(
+        self,
+        minutes: np.ndarray,
+        group_id: np.ndarray,
+        n_groups: int,
+        weekday: np.ndarray,
+        compute
+    ) -> np.ndarray:
+        """
+        Slot minutes per group; only cache misses go through
+        compute(minutes, group_id, n_groups, weekday).
+        """
+        result = np.empty((n_groups, self.N_SLOTS), dtype=np.uint16)
+        if n_groups == 0:
+            return result
+        keys, checks = self.digests(minutes, group_id, n_groups, weekday)
+
+        with self._lock:
+            position = self._index.get_indexer(keys)
+            hit = position >= 0
+            hit[hit] = self._checks[position[hit]] == checks[hit]
+            self._tick += 1
+            self._last_used[position[hit]] = self._tick
+            result[hit] = self._values[position[hit]]
+
+        miss_groups = np.flatnonzero(~hit)
+        if len(miss_groups):
+            row_mask = ~hit[group_id]
+            sub_group_id = np.searchsorted(miss_groups, group_id[row_mask])
+            result[miss_groups] = compute(
+                minutes[row_mask], sub_group_id, len(miss_groups), weekday[miss_groups]
+            )
+            with self._lock:
+                self._insert(keys[miss_groups], checks[miss_groups], result[miss_groups])
+
+        self.hits += int(hit.sum())
+        self.misses += len(miss_groups)
+        return result
+
+    def _insert(self, keys: np.ndarray, checks: np.ndarray, values: np.ndarray) -> None:
+        """Append new entries (caller holds the lock) and evict down to max_entries."""
+        keys, first = np.unique(keys, return_index=True)  # Punch identik di orang lain = key sama
+        fresh = self._index.get_indexer(keys) < 0          # Tabrakan key: entri lama dipertahankan
+        first = first[fresh]
+        if not len(first):
+            return
+        self._keys = np.concatenate([self._keys, keys[fresh]])
+        self._checks = np.concatenate([self._checks, checks[first]])
+        self._values = np.concatenate([self._values, values[first]])
+        self._last_used = np.concatenate([self._last_used, np.full(len(first), self._tick, dtype=np.int64)])
+
+        if len(self._keys) > self.max_entries:
+            keep = np.sort(np.argsort(-self._last_used, kind='stable')[:self.max_entries])
+            self._keys, self._checks = self._keys[keep], self._checks[keep]
+            self._values, self._last_used = self._values[keep], self._last_used[keep]
+        self._index = pd.Index(self._keys)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._reset()
+
+
 class TimeService:
     """
     Service class for time-related business logic.
@@ -495,66 +1684,67 @@ class TimeService:
     @staticmethod
     def is_late(time_str: Optional[str], employee_name: str = "", evening_str: Optional[str] = None, break_out_str: Optional[str] = None) -> Tuple[bool, str]:
         """
-        Final Ultimate Logic: 
+        Scalar wrapper around is_late_bulk for existing call sites.
+        Returns (is_late, "SHIFT 1" / "SHIFT 2"), or (False, "") if time_str is empty/invalid.
+        """
+        late, shift = TimeService.is_late_bulk(
+            pd.Series([time_str], dtype=object),
+            employee_names=pd.Series([employee_name], dtype=object),
+            evening=pd.Series([evening_str], dtype=object),
+            break_out=pd.Series([break_out_str], dtype=object),
+        )
+        return bool(late.iloc[0]), str(shift.iloc[0])
+
+    @staticmethod
+    def is_late_bulk(
+        arrival: pd.Series,
+        employee_names: Optional[pd.Series] = None,
+        evening: Optional[pd.Series] = None,
+        break_out: Optional[pd.Series] = None
+    ) -> Tuple[pd.Series, pd.Series]:
+        """
+        Final Ultimate Logic (vectorized, integer minute arithmetic):
         1. Cek Jam Pulang (Rule Dewa 1)
         2. Cek Jam Istirahat (Rule Dewa 2 - Solusi Noval)
         3. Cek Jam Datang (Fallback)
+        Returns a boolean late mask and a categorical shift label ('' if no valid arrival).
         """
-        if not time_str:
-            return False, ""
-        
-        try:
-            check_time = datetime.strptime(time_str, AppConstants.TIME_FORMAT).time()
-            detected_shift = "UNKNOWN"
-            
-            # --- 1. CEK JAM PULANG (Indikator Paling Akurat) ---
-            if evening_str:
-                try:
-                    evening_time = datetime.strptime(evening_str, AppConstants.TIME_FORMAT).time()
-                    if evening_time > time(18, 0, 0): 
-                        detected_shift = "SHIFT 2"
-                    else:
-                        detected_shift = "SHIFT 1"
-                except:
-                    pass
-
-            # --- 2. CEK JAM ISTIRAHAT (Solusi Kasus Noval 07:59 tapi Istirahat 14:00) ---
-            # Jika shift belum ketemu lewat jam pulang, cek jam istirahatnya
-            if detected_shift == "UNKNOWN" and break_out_str:
-                try:
-                    break_time = datetime.strptime(break_out_str, AppConstants.TIME_FORMAT).time()
-                    # Jika istirahat di atas jam 13:30, dia PASTI Shift 2
-                    # (Karena Shift 1 istirahat jam 12:00)
-                    if break_time > time(13, 30, 0):
-                        detected_shift = "SHIFT 2"
-                except:
-                    pass
-            
-            # --- 3. FALLBACK: PAKAI JAM DATANG (08:00) ---
-            if detected_shift == "UNKNOWN":
-                division_config = DivisionRegistry.find_by_member(employee_name)
-                is_special = division_config and division_config.name in getattr(AppConstants, 'SHIFT_2_DIVISIONS', [])
-                
-                if is_special:
-                    detected_shift = "SHIFT 2"
-                # Noval (07:59) akan lolos di Rule No. 2 di atas, jadi tidak kena cutoff ini
-                elif check_time <= AppConstants.SHIFT_CUTOFF:
-                    detected_shift = "SHIFT 1"
-                else:
-                    detected_shift = "SHIFT 2"
+        ShiftRuleTable.compile()
+        to_minute = ShiftRuleTable.to_minute
+        index = arrival.index
+        no_value = np.full(len(arrival), -1, dtype=np.int64)
+
+        arrival_minute = ShiftRuleTable.parse_minutes(arrival)
+        evening_minute = ShiftRuleTable.parse_minutes(evening) if evening is not None else no_value
+        break_minute = ShiftRuleTable.parse_minutes(break_out) if break_out is not None else no_value
+        has_arrival = arrival_minute >= 0
+
+        # --- 3. FALLBACK: DIVISI KHUSUS SHIFT 2, LALU CUTOFF JAM DATANG (08:00) ---
+        # Noval (07:59) akan lolos di Rule No. 2, jadi tidak kena cutoff ini
+        special_divisions = getattr(AppConstants, 'SHIFT_2_DIVISIONS', [])
+        if special_divisions and employee_names is not None:
+            is_special = DivisionRegistry.divisions_for(employee_names, 'name').isin(special_divisions).to_numpy()
+        else:
+            is_special = np.zeros(len(arrival), dtype=bool)
+        is_shift_2 = is_special | (arrival_minute > to_minute(AppConstants.SHIFT_CUTOFF))
 
-            # --- CEK KETERLAMBATAN ---
-            if detected_shift == "SHIFT 2":
-                # Toleransi 09:05 -> Noval (07:59) AMAN
-                is_late_val = check_time > AppConstants.S2_LATE_TOLERANCE 
-                return is_late_val, "SHIFT 2"
-            else:
-                # Toleransi 07:05
-                is_late_val = check_time > AppConstants.S1_LATE_TOLERANCE
-                return is_late_val, "SHIFT 1"
+        # --- 2. CEK JAM ISTIRAHAT: di atas 13:30 PASTI Shift 2 (Shift 1 istirahat 12:00) ---
+        is_shift_2 = np.where(break_minute > to_minute(AppConstants.S2_DETECT_BREAK_AFTER), True, is_shift_2)
 
-        except (ValueError, TypeError):
-            return False, ""
+        # --- 1. CEK JAM PULANG (Indikator Paling Akurat): lewat 18:00 = Shift 2 ---
+        is_shift_2 = np.where(
+            evening_minute >= 0, evening_minute > to_minute(AppConstants.S2_DETECT_EVENING_AFTER), is_shift_2
+        )
+
+        # --- CEK KETERLAMBATAN (Toleransi S1 07:05 / S2 09:05) ---
+        # Slot Pagi sama untuk semua hari, jadi cukup baca weekday 0
+        shift_idx = is_shift_2.astype(np.intp)
+        pagi_late = ShiftRuleTable.late[ShiftRuleTable.slot_index('Pagi'), :, 0]
+        late = has_arrival & pagi_late[shift_idx, np.maximum(arrival_minute, 0)]
+
+        shift_codes = np.where(has_arrival, shift_idx + 1, 0)
+        shift_label = pd.Categorical.from_codes(shift_codes, categories=("",) + ShiftRuleTable.SHIFTS)
+        return pd.Series(late, index=index), pd.Series(shift_label, index=index)
     
     @staticmethod
     def calculate_duration(start_time: str, end_time: str) -> Optional[timedelta]:
@@ -576,9 +1766,15 @@ class TimeService:
     @staticmethod
     def get_time_range_label(check_time: time) -> str:
         """Determine which time range a given time falls into."""
+        if check_time.second == 0 and check_time.microsecond == 0:
+            ShiftRuleTable.compile()
+            code = ShiftRuleTable.time_range_codes[ShiftRuleTable.to_minute(check_time)]
+            return list(TimeRanges)[code].label if code >= 0 else "UNKNOWN"
+
+        # Waktu dengan detik tidak selalu jatuh tepat di batas menit
         for time_range in TimeRanges:
-            start = time.fromisoformat(time_range.start_time)
-            end = time.fromisoformat(time_range.end_time)
+            start = time.fromisoformat(time_range.start_time.zfill(8))
+            end = time.fromisoformat(time_range.end_time.zfill(8))
             
             if start <= check_time <= end:
                 return time_range.label
@@ -591,26 +1787,34 @@ class AttendanceService:
     Core business logic service for attendance processing.
     """
     
-    def __init__(self, attendance_repo: AttendanceRepository, status_repo: StatusRepository):
+    def __init__(
+        self,
+        attendance_repo: AttendanceRepository,
+        status_repo: StatusRepository,
+        data_service: Optional[SharedDataService] = None
+    ):
         self.attendance_repo = attendance_repo
         self.status_repo = status_repo
+        self.data_service = data_service or SharedDataService(attendance_repo, status_repo)
         self.time_service = TimeService()
     
     def get_attendance_for_date(self, target_date: datetime.date) -> Optional[pd.DataFrame]:
-        df = self.attendance_repo.fetch()
-        if df is None: return None
-        return df[df['Tanggal'] == target_date].copy()
+        index = self.data_service.attendance_index()
+        if index is None: return None
+        return index.for_date(target_date)
     
     def get_status_for_date(self, target_date: datetime.date) -> Dict[str, str]:
-        df = self.status_repo.fetch()
-        if df is None: return {}
-        date_str = target_date.strftime(AppConstants.DATE_FORMAT)
-        df_filtered = df[df['Tanggal_Str'] == date_str]
-        if df_filtered.empty: return {}
-        return pd.Series(
-            df_filtered[AppConstants.COL_STATUS].values,
-            index=df_filtered[AppConstants.COL_EMPLOYEE_NAME]
-        ).to_dict()
+        calendar = self.data_service.status_calendar()
+        if calendar is None: return {}
+        return dict(calendar.for_date(target_date))
+    
+    def get_status_for_range(
+        self, start_date: datetime.date, end_date: datetime.date, snapshot: Optional[DataSnapshot] = None
+    ) -> Dict[datetime.date, Dict[str, str]]:
+        """Status dicts for every day in the range that has one, in a single lookup."""
+        calendar = snapshot.statuses if snapshot is not None else self.data_service.status_calendar()
+        if calendar is None: return {}
+        return {day: dict(statuses) for day, statuses in calendar.between(start_date, end_date).items()}
     
     def extract_time_ranges(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -622,164 +1826,84 @@ class AttendanceService:
         """
         if df.empty: return pd.DataFrame()
 
-        df_clean = df.dropna(subset=[AppConstants.COL_PERSON_NAME, 'Tanggal'])
+        df_clean = df.dropna(subset=[AppConstants.COL_PERSON_NAME])
         if df_clean.empty: return pd.DataFrame()
 
-        # Konversi ke object time untuk perbandingan
-        df_clean['Waktu_Obj'] = pd.to_datetime(df_clean[AppConstants.COL_EVENT_TIME]).dt.time
-        grouped = df_clean.groupby([AppConstants.COL_PERSON_NAME, 'Tanggal'])
-        
-        def process_group(group):
-            result = {'Pagi': '', 'Siang_1': '', 'Siang_2': '', 'Sore': ''}
-            
-            # 1. Sortir waktu dari pagi ke malam
-            sorted_group = group.sort_values(AppConstants.COL_EVENT_TIME)
-            if sorted_group.empty: return pd.Series(result)
+        # Menit dalam sehari (0-1439) sudah tersimpan di skema ringkas
+        minutes = df_clean[AppConstants.COL_MINUTE_OF_DAY].to_numpy(dtype=np.int64)
 
-            # 2. Ambil data kunci (Log Pertama & Log Terakhir)
-            first_log = sorted_group.iloc[0]['Waktu_Obj']
-            last_log = sorted_group.iloc[-1]['Waktu_Obj']
-            
-            # 3. Cek Hari Jumat
-            is_friday = sorted_group.iloc[0]['Tanggal'].weekday() == 4
-            
-            # --- LOGIKA PENENTUAN SHIFT ---
-            is_shift_2 = False
-            
-            # Rule 1: Jika pulang lewat 19:00, fix Shift 2 (Tesalonika pulang 19:02)
-            batas_pulang_s1_toleransi = time(19, 0, 0)
-            
-            # Rule 2: Jika log pertama ada di jam nanggung Shift 2 (09:00 - 11:00)
-            range_masuk_s2_start = time(9, 0, 0)
-            range_masuk_s2_end = time(11, 0, 0)
+        grouped = df_clean.groupby(
+            [AppConstants.COL_PERSON_NAME, AppConstants.COL_DAY_NUMBER], sort=True, observed=True
+        )
+        if grouped.ngroups == 0: return pd.DataFrame()
 
-            if last_log > batas_pulang_s1_toleransi:
-                is_shift_2 = True
-            elif range_masuk_s2_start <= first_log <= range_masuk_s2_end:
-                is_shift_2 = True
-            
-            # --- SETTING RANGE WAKTU (PEMBAGIAN SLOT) ---
-            if not is_shift_2:
-                # === SHIFT 1 ===
-                # Batas Pagi DIPERKETAT ke 11:00. 
-                # Jadi Sunarty (12:18) GAK BAKAL masuk Pagi.
-                limit_pagi_end = time(11, 0, 0) 
-                
-                # Range Siang 1 diperluas ke belakang biar nangkep Sunarty (12:18)
-                limit_siang_out_start = time(11, 1, 0) 
-                limit_siang_out_end    = time(12, 59, 59) 
-                
-                # Siang 2 (Masuk Istirahat)
-                limit_siang_in_start  = time(13, 0, 0)
-                limit_siang_in_end     = time(16, 0, 0) 
-                
-                # Sore
-                start_sore = time(16, 1, 0)
-                
-            else:
-                # === SHIFT 2 ===
-                # Pagi Shift 2 bisa datang jam 07:00 (Tesalonika 07:47 masuk sini)
-                # Tapi toleransi telatnya nanti dicek di TimeService (09:05)
-                limit_pagi_end = time(13, 0, 0) 
-                # ... (kode sebelumnya tetap sama) ...
-            
-            # --- SETTING RANGE WAKTU (PEMBAGIAN SLOT) ---
-            # --- SETTING RANGE WAKTU (PEMBAGIAN SLOT) ---
-            # --- SETTING RANGE WAKTU (PEMBAGIAN SLOT) ---
-            if not is_shift_2:
-                # ==========================================
-                # LOGIKA SHIFT 1 (PAGI)
-                # ==========================================
-                limit_pagi_end = time(11, 0, 0) 
-                
-                # KOLOM 1 (Keluar Istirahat): 12:00 - 12:59
-                # Buffer 11:30
-                limit_siang_out_start = time(11, 30, 0) 
-                limit_siang_out_end     = time(12, 59, 59) 
-                
-                # KOLOM 2 (Masuk Istirahat): 13:00 - 14:00
-                limit_siang_in_start   = time(13, 0, 0)
-                limit_siang_in_end      = time(14, 0, 0) 
+        group_id = grouped.ngroup().to_numpy()
+        group_keys = grouped.size().index
+        day_numbers = group_keys.get_level_values(AppConstants.COL_DAY_NUMBER).to_numpy(dtype=np.int64)
 
-                # ATURAN PULANG SHIFT 1: Minimal Jam 17:00
-                start_sore = time(17, 0, 0)
-                
-            else:
-                # ==========================================
-                # LOGIKA SHIFT 2 (SIANG)
-                # ==========================================
-                limit_pagi_end = time(11, 0, 0)  
-                
-                if is_friday:
-                    # --- KHUSUS HARI JUMAT SHIFT 2 ---
-                    # Istirahat: 12:00 - 14:00
-                    
-                    # Kolom 1 (Keluar): 11:30 - 12:59
-                    limit_siang_out_start = time(11, 30, 0) 
-                    limit_siang_out_end     = time(12, 59, 59)
-                    
-                    # Kolom 2 (Masuk): 13:00 - 14:00
-                    limit_siang_in_start   = time(13, 0, 0)
-                    limit_siang_in_end      = time(14, 0, 0) 
-                    
-                else:
-                    # --- HARI NORMAL SHIFT 2 (Senin-Kamis, Sabtu-Minggu) ---
-                    # Istirahat: 14:00 - 16:00
-                    
-                    # Kolom 1 (Keluar): 13:30 - 14:59
-                    limit_siang_out_start = time(13, 30, 0) 
-                    limit_siang_out_end     = time(14, 59, 59)
-                    
-                    # Kolom 2 (Masuk): 15:00 - 16:00
-                    limit_siang_in_start   = time(15, 0, 0)
-                    limit_siang_in_end      = time(16, 0, 0)
+        # Hari (Jumat punya jam istirahat sendiri untuk Shift 2); 1970-01-01 = Kamis
+        weekday = (day_numbers + 3) % 7
 
-                # ATURAN PULANG SHIFT 2: Minimal Jam 19:00 (Berlaku Tiap Hari)
-                start_sore = time(19, 0, 0)
+        # Person-day yang punch-nya sama dengan sebelumnya diambil dari cache
+        slot_minutes = self.data_service.slot_cache.get_or_compute(
+            minutes, group_id, len(group_keys), weekday, self._classify_slots
+        )
+        no_log = ShiftRuleTable.MINUTES_PER_DAY
+        labels = np.array(
+            [f"{m // 60:02d}:{m % 60:02d}" for m in range(no_log)] + [''], dtype=object
+        )
 
-            # --- MAPPING DATA KE KOLOM ---
-            for _, row in sorted_group.iterrows():
-                t = row['Waktu_Obj']
-                val_str = row[AppConstants.COL_EVENT_TIME].strftime(AppConstants.TIME_FORMAT)
-                
-                # 1. Pagi
-                # Sunarty (12:18) > 11:00 -> GAGAL masuk Pagi (Good!)
-                if t < limit_pagi_end:
-                    if result['Pagi'] == '': result['Pagi'] = val_str
-                
-                # 2. Siang 1
-                # Sunarty (12:18) masuk range 11:01 - 12:59 -> MASUK SINI (Good!)
-                elif limit_siang_out_start <= t <= limit_siang_out_end:
-                    if result['Siang_1'] == '': result['Siang_1'] = val_str
-                
-                # 3. Siang 2
-                # Yoga (13:23) masuk range 13:00 - 16:00 -> MASUK SINI (Good!)
-                elif limit_siang_in_start <= t <= limit_siang_in_end:
-                    if result['Siang_2'] == '': result['Siang_2'] = val_str
-                
-                # 4. Sore
-                elif t >= start_sore:
-                    result['Sore'] = val_str 
-                
-                # Fallback Sore (Jaga-jaga log terakhir)
-                if t == last_log and t >= time(16, 0, 0) and result['Sore'] == '':
-                     result['Sore'] = val_str
+        result_df = pd.DataFrame({
+            AppConstants.COL_EMPLOYEE_NAME: group_keys.get_level_values(AppConstants.COL_PERSON_NAME).astype(object),
+            'Tanggal': AttendanceSchema.to_dates(day_numbers),
+            'Pagi': labels[slot_minutes[:, 0]],
+            'Siang_1': labels[slot_minutes[:, 1]],
+            'Siang_2': labels[slot_minutes[:, 2]],
+            'Sore': labels[slot_minutes[:, 3]],
+        })
+        return result_df
 
-            return pd.Series(result)
+    @staticmethod
+    def _classify_slots(
+        minutes: np.ndarray, group_id: np.ndarray, n_groups: int, weekday: np.ndarray
+    ) -> np.ndarray:
+        """
+        Columnar slot classifier: minute of day of Pagi / Siang_1 / Siang_2 / Sore
+        per group (MINUTES_PER_DAY = kosong). group_id must cover 0..n_groups-1.
+        """
+        # 1. Log Pertama & Log Terakhir per (orang, tanggal)
+        per_group = pd.Series(minutes).groupby(group_id)
+        first_log = per_group.min().to_numpy()
+        last_log = per_group.max().to_numpy()
+
+        # --- LOGIKA PENENTUAN SHIFT ---
+        # Rule 1: Jika pulang lewat 19:00, fix Shift 2 (Tesalonika pulang 19:02)
+        # Rule 2: Jika log pertama ada di jam nanggung Shift 2 (09:00 - 11:00)
+        to_minute = ShiftRuleTable.to_minute
+        is_shift_2 = (
+            (last_log > to_minute(AppConstants.S2_DETECT_HOME_AFTER))
+            | ((first_log >= to_minute(AppConstants.S2_DETECT_ARRIVAL_START))
+               & (first_log <= to_minute(AppConstants.S2_DETECT_ARRIVAL_END)))
+        )
+        shift_idx = is_shift_2.astype(np.intp)
 
-        if grouped.ngroups == 0: return pd.DataFrame()
-        result_df = grouped.apply(process_group).reset_index()
-        result_df.rename(columns={AppConstants.COL_PERSON_NAME: AppConstants.COL_EMPLOYEE_NAME}, inplace=True)
-        return result_df
+        # --- MAPPING DATA KE KOLOM (1 index tabel per log) ---
+        # Pagi/Siang_1/Siang_2 = log pertama di slotnya.
+        # Sore = log terakhir jika masuk jendela Sore (>= 16:00).
+        ShiftRuleTable.compile()
+        slot_codes = ShiftRuleTable.slot_codes[shift_idx[group_id], weekday[group_id], minutes]
+        no_log = ShiftRuleTable.MINUTES_PER_DAY
 
-        if grouped.ngroups == 0: return pd.DataFrame()
-        result_df = grouped.apply(process_group).reset_index()
-        result_df.rename(columns={AppConstants.COL_PERSON_NAME: AppConstants.COL_EMPLOYEE_NAME}, inplace=True)
-        return result_df
-        if grouped.ngroups == 0: return pd.DataFrame()
-        result_df = grouped.apply(process_group).reset_index()
-        result_df.rename(columns={AppConstants.COL_PERSON_NAME: AppConstants.COL_EMPLOYEE_NAME}, inplace=True)
-        return result_df
+        def first_in_slot(slot: str) -> np.ndarray:
+            in_slot = slot_codes == ShiftRuleTable.slot_index(slot)
+            return pd.Series(np.where(in_slot, minutes, no_log)).groupby(group_id).min().to_numpy()
+
+        sore_window = ShiftRuleTable.in_window[ShiftRuleTable.slot_index('Sore')]
+        sore = np.where(sore_window[shift_idx, weekday, last_log], last_log, no_log)
+
+        return np.column_stack([
+            first_in_slot('Pagi'), first_in_slot('Siang_1'), first_in_slot('Siang_2'), sore
+        ]).astype(np.uint16)
 
     def build_complete_report(self, target_date: datetime.date) -> Tuple[pd.DataFrame, Dict[str, str]]:
         """
@@ -804,52 +1928,159 @@ class AttendanceService:
                 df_final[col] = ''
 
         df_final.fillna('', inplace=True)
+        df_final = self.annotate_report(df_final, status_dict, target_date)
         return df_final, status_dict
 
+    def build_range_report(
+        self, start_date: datetime.date, end_date: datetime.date, snapshot: Optional[DataSnapshot] = None
+    ) -> Dict[datetime.date, Tuple[pd.DataFrame, Dict[str, str]]]:
+        """
+        Range version of build_complete_report for the multi-day export.
+        One index slice, one extract_time_ranges pass and one roster x day grid
+        for the whole range; returns {date: (df_final, status_dict)} for every
+        day, identical to calling build_complete_report per day.
+        snapshot pins the data to read (default: the current one).
+        """
+        index = snapshot.attendance if snapshot is not None else self.data_service.attendance_index()
+        df_range = index.between(start_date, end_date) if index is not None else pd.DataFrame()
+        df_times = self.extract_time_ranges(df_range) if not df_range.empty else pd.DataFrame()
+        statuses = self.get_status_for_range(start_date, end_date, snapshot)
+
+        days = pd.date_range(start_date, end_date, freq='D').date
+        all_employees = DivisionRegistry.get_all_members()
+        slot_columns = ['Pagi', 'Siang_1', 'Siang_2', 'Sore']
+        n_employees = len(all_employees)
+
+        # Grid roster x hari: baris = posisi_hari * jumlah_karyawan + posisi_karyawan
+        slot_grid = np.full((len(days) * n_employees, len(slot_columns)), '', dtype=object)
+        date_grid = np.full(len(days) * n_employees, '', dtype=object)
+        days_with_times = set()
+        if not df_times.empty:
+            employee_pos = pd.Index(all_employees).get_indexer(df_times[AppConstants.COL_EMPLOYEE_NAME])
+            day_pos = pd.Index(days).get_indexer(df_times['Tanggal'])
+            keep = (employee_pos >= 0) & (day_pos >= 0)
+            rows = day_pos[keep] * n_employees + employee_pos[keep]
+            slot_grid[rows] = df_times[slot_columns].to_numpy(dtype=object)[keep]
+            date_grid[rows] = df_times['Tanggal'].to_numpy(dtype=object)[keep]
+            days_with_times = set(days[np.unique(day_pos[keep])])
+
+        # Keterangan manual & hari per baris grid, lalu anotasi sekali untuk semua hari
+        manual_grid = np.full(len(days) * n_employees, '', dtype=object)
+        employee_index = pd.Index(all_employees)
+        for day_idx, day in enumerate(days):
+            day_status = statuses.get(day)
+            if day_status:
+                names = list(day_status)
+                employee_pos = employee_index.get_indexer(names)
+                found = employee_pos >= 0
+                manual_grid[day_idx * n_employees + employee_pos[found]] = [
+                    str(day_status[name]) for name, ok in zip(names, found) if ok
+                ]
+        weekdays = np.repeat(pd.DatetimeIndex(days).weekday.to_numpy(), n_employees)
+
+        df_grid = pd.DataFrame({
+            AppConstants.COL_EMPLOYEE_NAME: np.tile(np.array(all_employees, dtype=object), len(days)),
+            'Tanggal': date_grid,
+        })
+        df_grid[slot_columns] = slot_grid
+        df_grid = self._annotate(df_grid, manual_grid, weekdays)
+
+        report = {}
+        for day_idx, day in enumerate(days):
+            df_final = df_grid.iloc[day_idx * n_employees:(day_idx + 1) * n_employees].reset_index(drop=True)
+            # Sama seperti merge per hari: kolom Tanggal hanya ada jika hari itu ada log
+            if day not in days_with_times:
+                df_final = df_final.drop(columns='Tanggal')
+            report[day] = (df_final, statuses.get(day, {}))
+        return report
+
+    def annotate_report(self, df: pd.DataFrame, status_dict: Dict[str, str], target_date: datetime.date) -> pd.DataFrame:
+        """
+        Annotates the report frame once, in bulk, so metrics, cards, table and
+        Excel all read the same Shift / lateness / status columns.
+        """
+        manual_status = df[AppConstants.COL_EMPLOYEE_NAME].map(status_dict).fillna('').astype(str)
+        weekdays = np.full(len(df), target_date.weekday(), dtype=np.intp)
+        return self._annotate(df, manual_status.to_numpy(), weekdays)
+
+    def _annotate(self, df: pd.DataFrame, manual_status: np.ndarray, weekdays: np.ndarray) -> pd.DataFrame:
+        """annotate_report with per-row manual status and weekday (multi-day frames)."""
+        df = df.copy()
+        to_minute = ShiftRuleTable.to_minute
+        ShiftRuleTable.compile()
+
+        names = df[AppConstants.COL_EMPLOYEE_NAME]
+        pagi = ShiftRuleTable.parse_minutes(df['Pagi'])
+        siang_2 = ShiftRuleTable.parse_minutes(df['Siang_2'])
+        sore = ShiftRuleTable.parse_minutes(df['Sore'])
+        has_pagi, has_siang_2, has_sore = pagi >= 0, siang_2 >= 0, sore >= 0
+
+        # --- SHIFT & TELAT DATANG (Logika TimeService.is_late) ---
+        late_arrival, shift = TimeService.is_late_bulk(df['Pagi'], names, evening=df['Sore'])
+        # Label kategori langsung ke object: astype(str) pada kategori kosong gagal
+        # di pandas 2.x + numpy 2 dengan Copy-on-Write
+        df[AppConstants.COL_SHIFT] = shift.to_numpy(dtype=object)
+        df[AppConstants.COL_LATE_ARRIVAL] = late_arrival.to_numpy()
+
+        # --- TELAT BALIK ISTIRAHAT (Logika laporan Excel) ---
+        # Pulang lewat 19:00 atau datang 08:00 - 11:30 -> batas balik Shift 2
+        excel_shift_2 = (
+            (has_sore & (sore > to_minute(AppConstants.S2_DETECT_HOME_AFTER)))
+            | (has_pagi
+               & (pagi >= to_minute(AppConstants.S2_EXCEL_ARRIVAL_START))
+               & (pagi <= to_minute(AppConstants.S2_EXCEL_ARRIVAL_END)))
+        )
+        return_late = ShiftRuleTable.late[ShiftRuleTable.slot_index('Siang_2')]
+        df[AppConstants.COL_LATE_RETURN] = (
+            has_siang_2 & return_late[excel_shift_2.astype(np.intp), weekdays, np.maximum(siang_2, 0)]
+        )
+
+        # --- STATUS KEHADIRAN ---
+        empty_count = (df[['Pagi', 'Siang_1', 'Siang_2', 'Sore']] == '').sum(axis=1).to_numpy()
+        df[AppConstants.COL_STATUS] = manual_status
+        df[AppConstants.COL_STATUS_CODE] = np.select(
+            [manual_status != '', empty_count == 4, empty_count > 0],
+            [AttendanceStatus.PERMIT.name, AttendanceStatus.ABSENT.name, AttendanceStatus.PARTIAL_DUTY.name],
+            default=AttendanceStatus.FULL_DUTY.name,
+        )
+        return df
+
     def calculate_metrics(self, df: pd.DataFrame, status_dict: Dict[str, str]) -> Dict[str, Any]:
         """
         Calculates daily statistics (Present, Absent, Late, etc.)
-        FIXED: Unpack is_late tuple correctly.
+        Mask-based: one boolean column per category, lists keep row order.
+        Late arrivals come from annotate_report; an unannotated frame counts nobody late.
         """
         total_employees = len(df)
-        present_count = 0; permit_count = 0; absent_count = 0; late_count = 0
-        late_list = []; permit_list = []; absent_list = []; partial_list = []
-        
-        for idx, row in df.iterrows():
-            name = row[AppConstants.COL_EMPLOYEE_NAME]
-            times = [row.get('Pagi', ''), row.get('Siang_1', ''), 
-                     row.get('Siang_2', ''), row.get('Sore', '')]
-            empty_count = sum(1 for t in times if t == '')
-            manual_status = status_dict.get(name, "")
-            
-            if manual_status:
-                permit_count += 1
-                permit_list.append((name, manual_status))
-            elif empty_count == 4:
-                absent_count += 1
-                absent_list.append(name)
-            else:
-                present_count += 1
-                morning_time = row.get('Pagi', '')
-                
-                # --- PERBAIKAN DISINI ---
-                # --- PERBAIKAN DI SINI ---
-                if morning_time:
-                    # Ambil jam pulang dari row
-                    evening_time = row.get('Sore', '')
-                    
-                    # PASSING LENGKAP: Waktu Datang, Nama, Waktu Pulang
-                    is_late_status, _ = self.time_service.is_late(morning_time, name, evening_time)
-                    
-                    if is_late_status:
-                        late_count += 1
-                        late_list.append((name, morning_time))
-                # ------------------------
-                # ------------------------
+        slot_columns = [slot for slot in ('Pagi', 'Siang_1', 'Siang_2', 'Sore') if slot in df.columns]
+
+        names = df[AppConstants.COL_EMPLOYEE_NAME]
+        manual_status = names.map(status_dict).fillna('')
+        empty_count = (df[slot_columns] == '').sum(axis=1) + (4 - len(slot_columns))
+        morning_time = df['Pagi'] if 'Pagi' in df.columns else pd.Series('', index=df.index)
+        if AppConstants.COL_LATE_ARRIVAL in df.columns:
+            late_arrival = df[AppConstants.COL_LATE_ARRIVAL].astype(bool)
+        else:
+            late_arrival = pd.Series(False, index=df.index)
+
+        # Prioritas sama seperti sebelumnya: izin manual > tidak hadir > hadir
+        is_permit = manual_status.astype(bool)
+        is_absent = ~is_permit & (empty_count == 4)
+        is_present = ~is_permit & ~is_absent
+        # Telat sudah dihitung sekali di annotate_report
+        is_late = is_present & morning_time.fillna('').astype(bool) & late_arrival
+        is_partial = is_present & (empty_count > 0)
+
+        present_count = int(is_present.sum())
+        permit_count = int(is_permit.sum())
+        absent_count = int(is_absent.sum())
+        late_count = int(is_late.sum())
+
+        late_list = list(zip(names[is_late].tolist(), morning_time[is_late].tolist()))
+        permit_list = list(zip(names[is_permit].tolist(), manual_status[is_permit].tolist()))
+        absent_list = names[is_absent].tolist()
+        partial_list = list(zip(names[is_partial].tolist(), empty_count[is_partial].tolist()))
 
-                if empty_count > 0:
-                    partial_list.append((name, empty_count))
-        
         return {
             'total': total_employees, 'present': present_count, 'permit': permit_count,
             'absent': absent_count, 'late': late_count, 'late_list': late_list,
@@ -863,20 +2094,20 @@ class AnalyticsService:
     Provides statistical analysis and trend detection.
     """
     
-    def __init__(self, attendance_repo: AttendanceRepository):
+    def __init__(self, attendance_repo: AttendanceRepository, data_service: Optional[SharedDataService] = None):
         self.attendance_repo = attendance_repo
+        self.data_service = data_service or SharedDataService(attendance_repo, None)
     
     def get_weekly_trends(self, end_date: datetime.date, weeks: int = 4) -> pd.DataFrame:
         """
         Get attendance trends over multiple weeks.
         """
-        df = self.attendance_repo.fetch()
-        if df is None:
+        index = self.data_service.attendance_index()
+        if index is None:
             return pd.DataFrame()
         
         start_date = end_date - timedelta(weeks=weeks)
-        mask = (df['Tanggal'] >= start_date) & (df['Tanggal'] <= end_date)
-        df_period = df[mask].copy()
+        df_period = index.between(start_date, end_date)
         
         # Group by week
         df_period['Week'] = df_period[AppConstants.COL_EVENT_TIME].dt.isocalendar().week
@@ -895,11 +2126,11 @@ class AnalyticsService:
         """
         Calculate statistics per division.
         """
-        df = self.attendance_repo.fetch()
-        if df is None:
+        index = self.data_service.attendance_index()
+        if index is None:
             return {}
         
-        df_day = df[df['Tanggal'] == target_date]
+        df_day = index.for_date(target_date)
         stats = {}
         
         for division_name, division_config in DivisionRegistry.get_all().items():
@@ -951,7 +2182,305 @@ class AnalyticsService:
 # SECTION 4: EXPORT & REPORTING LAYER (MODIFIED FOR IMAGE REPLICATION)
 # ================================================================================
 
+class ExportArtifact:
+    """
+    A finished workbook. Up to EXPORT_SPOOL_MAX_BYTES it is kept as bytes;
+    larger ones are copied in chunks to an anonymous temporary file, so a big
+    range export costs disk, not RAM, while it waits to be downloaded. The
+    file disappears when the last reference (cache entry or job) is dropped.
+    """
+    
+    def __init__(self, data: Optional[bytes] = None, file: Optional[io.IOBase] = None, size: int = 0):
+        self._data = data
+        self._file = file
+        self._lock = threading.Lock()
+        self.size = len(data) if data is not None else size
+    
+    @classmethod
+    def from_output(cls, output: io.IOBase) -> "ExportArtifact":
+        """Take over a builder's output (BytesIO or spooled file); it is closed or kept as the artifact's file."""
+        size = output.seek(0, io.SEEK_END)
+        output.seek(0)
+        if size <= AppConstants.EXPORT_SPOOL_MAX_BYTES:
+            with output:
+                return cls(data=output.read())
+        if isinstance(output, tempfile.SpooledTemporaryFile):
+            return cls(file=output, size=size)  # Lewat max_size: isinya sudah di disk
+        file = tempfile.TemporaryFile(prefix="wedabay-export-", suffix=".xlsx")
+        with output:
+            shutil.copyfileobj(output, file)
+        return cls(file=file, size=size)
+    
+    @property
+    def in_memory(self) -> bool:
+        return self._data is not None
+    
+    def read(self) -> bytes:
+        """Workbook bytes; for a file artifact only call this when the download is served."""
+        if self._data is not None:
+            return self._data
+        with self._lock:
+            self._file.seek(0)
+            return self._file.read()
+
+
+class ExportCache:
+    """
+    Process-wide store of generated workbooks, addressed by a digest of what
+    went into them (report content or data version, dates, exporter version).
+    Workbooks are only built when someone actually downloads; every later
+    request for the same key is served from the cache, and concurrent first
+    requests wait for a single build (single-flight per key). Bounded (LRU)
+    by the bytes held in memory and, for large workbooks kept in temporary
+    files, by the bytes on disk.
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int = AppConstants.EXPORT_CACHE_MAX_BYTES,
+        max_disk_bytes: int = AppConstants.EXPORT_CACHE_MAX_DISK_BYTES
+    ):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, ExportArtifact]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._size = 0
+        self._disk_size = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Digest of the given parts; DataFrames are hashed by content."""
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, pd.DataFrame):
+                digest.update(repr(list(part.columns)).encode())
+                digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+            else:
+                digest.update(repr(part).encode())
+            digest.update(b'\x1f')
+        return digest.hexdigest()
+    
+    def get_or_build(self, key: str, build: Callable[[], Optional[io.IOBase]]) -> Optional[ExportArtifact]:
+        """
+        Cached workbook for key; otherwise build() once and keep the result (None is
+        not cached). Callers arriving while that key is being built wait for it
+        and share its result; if the build raised, they try again themselves.
+        """
+        while True:
+            with self._lock:
+                data = self._entries.get(key)
+                if data is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return data
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    inflight = self._inflight[key] = Future()
+                    self.misses += 1
+                    break
+            try:
+                data = inflight.result()
+            except Exception:
+                continue  # Build pemimpin gagal / dibatalkan: coba bangun sendiri
+            with self._lock:
+                self.hits += 1
+            return data
+        
+        try:
+            data = self._build(key, build)
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        else:
+            inflight.set_result(data)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return data
+    
+    def _build(self, key: str, build: Callable[[], Optional[io.IOBase]]) -> Optional[ExportArtifact]:
+        output = build()
+        if output is None:
+            return None
+        artifact = ExportArtifact.from_output(output)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = artifact
+                self._account(artifact, 1)
+            while (self._size > self.max_bytes or self._disk_size > self.max_disk_bytes) and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._account(evicted, -1)
+        return artifact
+    
+    def _account(self, artifact: ExportArtifact, sign: int) -> None:
+        if artifact.in_memory:
+            self._size += sign * artifact.size
+        else:
+            self._disk_size += sign * artifact.size
+
+
+class ExportCancelled(Exception):
+    """Raised inside a running export once its job has been cancelled."""
+
+
+@dataclass
+class ExportJob:
+    """One background export. Fields are written by ExportJobQueue only."""
+    job_id: str
+    owner: str                      # Token sesi/URL yang men-submit; hanya dia yang melihat job ini
+    label: str
+    file_name: str
+    cache_key: str
+    status: str = "queued"          # queued | running | done | failed | cancelled
+    progress: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    artifact: Optional[ExportArtifact] = field(default=None, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+    
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+class ExportJobQueue:
+    """
+    Background runner for bulk exports; one worker pool for the process, but
+    every job belongs to the owner token that submitted it and is only listed,
+    cancelled or fetched for that owner.
+    A job gets an id, reports progress, can be cancelled between sheets and
+    keeps its finished file for later download, so a long range export
+    neither blocks reruns nor dies with a browser refresh. History is kept
+    per owner (last EXPORT_JOB_HISTORY jobs, finished files up to
+    EXPORT_JOB_OWNER_MAX_BYTES), so one owner's exports never push out another's.
+    Submitting a cache key the same owner already has queued, running or done
+    returns that job; results also go through ExportCache, so identical exports
+    of different owners are built once.
+    """
+    
+    def __init__(
+        self,
+        cache: ExportCache,
+        max_workers: int = AppConstants.EXPORT_JOB_WORKERS,
+        history: int = AppConstants.EXPORT_JOB_HISTORY,
+        max_bytes: int = AppConstants.EXPORT_JOB_OWNER_MAX_BYTES
+    ):
+        self.cache = cache
+        self.history = history
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, "OrderedDict[str, ExportJob]"] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export-job")
+    
+    def submit(
+        self,
+        owner: str,
+        label: str,
+        file_name: str,
+        cache_key: str,
+        build: Callable[[Callable[[float], None]], Optional[io.IOBase]]
+    ) -> ExportJob:
+        """Queue build(progress) unless owner already has the same export queued, running or done."""
+        with self._lock:
+            owner_jobs = self._jobs.setdefault(owner, OrderedDict())
+            for job in owner_jobs.values():
+                if job.cache_key == cache_key and (job.active or job.status == "done"):
+                    return job
+            job = ExportJob(
+                job_id=uuid.uuid4().hex[:8], owner=owner, label=label, file_name=file_name, cache_key=cache_key
+            )
+            owner_jobs[job.job_id] = job
+            self._trim(owner)
+            job.future = self._executor.submit(self._run, job, build)
+        return job
+    
+    def cancel(self, job_id: str, owner: str) -> None:
+        """Cancel owner's queued job now, or a running one at its next progress report."""
+        with self._lock:
+            job = self._jobs.get(owner, {}).get(job_id)
+            if job is None or not job.active:
+                return
+            job.cancel_event.set()
+            if job.future is not None and job.future.cancel():
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+    
+    def get(self, job_id: str, owner: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(owner, {}).get(job_id)
+    
+    def jobs(self, owner: str) -> List[ExportJob]:
+        """Owner's kept jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.get(owner, {}).values()))
+    
+    def _trim(self, owner: str) -> None:
+        """
+        Forget owner's oldest finished jobs beyond history or the byte budget
+        (caller holds the lock). The newest finished job is always kept.
+        """
+        owner_jobs = self._jobs.get(owner)
+        if owner_jobs is None:
+            return
+        finished = [job for job in owner_jobs.values() if not job.active]
+        kept_bytes = sum(job.artifact.size for job in finished if job.artifact is not None)
+        for job in finished[:-1]:
+            if len(owner_jobs) <= self.history and kept_bytes <= self.max_bytes:
+                break
+            del owner_jobs[job.job_id]
+            if job.artifact is not None:
+                kept_bytes -= job.artifact.size
+        if not owner_jobs:
+            del self._jobs[owner]
+    
+    def _run(self, job: ExportJob, build: Callable[[Callable[[float], None]], Optional[io.IOBase]]) -> None:
+        def report(fraction: float) -> None:
+            if job.cancel_event.is_set():
+                raise ExportCancelled(job.job_id)
+            job.progress = min(max(fraction, 0.0), 1.0)
+        
+        with self._lock:
+            if job.cancel_event.is_set():
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+                return
+            job.status = "running"
+        try:
+            data = self.cache.get_or_build(job.cache_key, lambda: build(report))
+        except ExportCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = f"❌ Export gagal: {e}"
+            job.status = "failed"
+        else:
+            if data is None:
+                job.error = "No data found for the selected range."
+                job.status = "failed"
+            else:
+                job.artifact = data
+                job.progress = 1.0
+                job.status = "done"
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                self._trim(job.owner)  # Ukuran file baru diketahui setelah selesai
+
+
 class ExcelExporter:
+    # Naikkan jika isi/format workbook berubah (bagian dari key ExportCache)
+    VERSION = 1
+    # Jam "07:05" mengandung ':' -> tanpa strings_to_urls=False xlsxwriter
+    # mencocokkan 4 pola URL untuk setiap sel jam
+    WORKBOOK_OPTIONS = {'in_memory': True, 'strings_to_urls': False}
+    # Range report: tiap baris langsung di-flush ke file sementara (constant_memory),
+    # jadi memori tidak ikut tumbuh dengan jumlah sheet
+    STREAMING_OPTIONS = {'constant_memory': True, 'strings_to_urls': False, 'tmpdir': tempfile.gettempdir()}
+    
     def __init__(self):
         self.workbook = None
         self.formats = {}
@@ -964,138 +2493,235 @@ class ExcelExporter:
         self.fmt_full = workbook.add_format({'bg_color': '#FFFF00', 'border': 1, 'align': 'center'}) 
         self.fmt_late = workbook.add_format({'font_color': 'red', 'bold': True, 'border': 1, 'align': 'center'})
 
-    def _write_sheet_content(self, ws, df: pd.DataFrame, status_dict: Dict[str, str], target_date: date):
+    def _write_sheet_content(self, ws, df: pd.DataFrame):
+        """Writes one day sheet from a frame annotated by AttendanceService.annotate_report."""
         # Headers
         headers = ['Nama Karyawan', 'Pagi', 'Siang_1', 'Siang_2', 'Sore', 'Keterangan']
         ws.write_row(0, 0, headers, self.fmt_head)
         ws.set_column(0, 0, 30)
         ws.set_column(1, 5, 15)
         
-        is_friday_global = (target_date.weekday() == 4)
-
-        for idx, row in df.iterrows():
-            row_num = idx + 1
-            
-            nm = row[AppConstants.COL_EMPLOYEE_NAME]
-            pagi_str = row.get('Pagi', '')
-            siang1_str = row.get('Siang_1', '') 
-            siang2_str = row.get('Siang_2', '') 
-            sore_str = row.get('Sore', '')
-            manual_stat = status_dict.get(nm, "")
-            
-            ws.write(row_num, 0, nm, self.fmt_norm)
-            ws.write(row_num, 5, manual_stat, self.fmt_norm)
-
-            # LOGIC 1: Izin Manual -> Kuning
-            if manual_stat:
-                for i in range(1, 5): ws.write(row_num, i, "", self.fmt_full)
-                continue 
-
-            # LOGIC 2: Alpha (Kosong Semua) -> Kuning Full
-            if not pagi_str and not siang1_str and not siang2_str and not sore_str:
-                for i in range(1, 5): ws.write(row_num, i, "", self.fmt_full)
-                continue 
-
-            # --- SINKRONISASI LOGIKA DETEKSI SHIFT (MIRRORING DASHBOARD) ---
-            # Kita perlu menebak dia Shift 1 atau 2 supaya batas merahnya benar
-            is_shift_2 = False
-            
-            # 1. Cek Jam Pulang (Rule Dewa)
-            if sore_str:
-                try:
-                    t_pulang = datetime.strptime(sore_str, "%H:%M").time()
-                    if t_pulang > time(19, 0, 0): # Lebih dari 19:00 fix Shift 2
-                        is_shift_2 = True
-                except ValueError:
-                    pass
-
-            # 2. Cek Jam Datang (Rule Jam Nanggung)
-            t_pagi = None
-            if pagi_str:
-                try:
-                    t_pagi = datetime.strptime(pagi_str, "%H:%M").time()
-                    # Jika belum terdeteksi S2 dari pulang, cek jam datang
-                    if not is_shift_2:
-                        if time(8, 0, 0) <= t_pagi <= time(11, 30, 0):
-                            is_shift_2 = True
-                except ValueError:
-                    pass
-            
-            # --- TENTUKAN BATAS MERAH BERDASARKAN HASIL DI ATAS ---
-            if is_shift_2:
-                # Shift 2
-                batas_datang = AppConstants.S2_LATE_TOLERANCE # 09:05
-                if is_friday_global:
-                    batas_balik = AppConstants.S1_BREAK_IN_END # 14:00 (Jumat)
-                else:
-                    batas_balik = time(16, 0, 0) # Normal S2 (16:00)
-            else:
-                # Shift 1
-                batas_datang = AppConstants.S1_LATE_TOLERANCE # 07:05
-                batas_balik = time(14, 0, 0) # Normal S1 (14:00)
-
-            # --- WRITE CELLS WITH COLORING ---
-
-            # 1. Pagi (Datang)
-            # 1. Pagi (Datang)
-            if pagi_str and t_pagi:
-                # Tambahkan parameter sore_str
-                is_late_excel, _ = TimeService.is_late(pagi_str, nm, sore_str) 
-                
-                fmt = self.fmt_late if is_late_excel else self.fmt_norm
-                ws.write(row_num, 1, pagi_str, fmt)
-            else:
-                ws.write(row_num, 1, "", self.fmt_miss) # Merah Kosong
-
-            # 2. Siang 1 (Keluar) - Standar
-            ws.write(row_num, 2, siang1_str, self.fmt_norm if siang1_str else self.fmt_miss) 
-
-            # 3. Siang 2 (Balik) - Cek Telat Balik
-            if siang2_str:
-                try:
-                    t_balik = datetime.strptime(siang2_str, "%H:%M").time()
-                    fmt = self.fmt_late if t_balik > batas_balik else self.fmt_norm
-                    ws.write(row_num, 3, siang2_str, fmt)
-                except ValueError:
-                    ws.write(row_num, 3, siang2_str, self.fmt_norm)
-            else:
-                ws.write(row_num, 3, "", self.fmt_miss) 
-
-            # 4. Sore (Pulang)
-            ws.write(row_num, 4, sore_str, self.fmt_norm if sore_str else self.fmt_miss)
-
-    def create_attendance_report(self, df: pd.DataFrame, status_dict: Dict[str, str], date_obj: date, metrics: Any = None):
-        """Creates a single sheet report"""
+        values, format_codes = self._cell_matrices(df)
+        cell_formats = [self.fmt_norm, self.fmt_miss, self.fmt_full, self.fmt_late]
+        
+        # Satu write_row per potongan sel berformat sama (umumnya 2-4 per baris)
+        n_cols = len(headers)
+        for row_num, (row_values, row_codes) in enumerate(zip(values, format_codes.tolist()), start=1):
+            start = 0
+            for end in range(1, n_cols + 1):
+                if end == n_cols or row_codes[end] != row_codes[start]:
+                    ws.write_row(row_num, start, row_values[start:end], cell_formats[row_codes[start]])
+                    start = end
+    
+    @staticmethod
+    def _cell_matrices(df: pd.DataFrame) -> Tuple[List[List[str]], np.ndarray]:
+        """
+        Value matrix and format-code matrix (0 normal, 1 merah kosong, 2 kuning
+        full, 3 telat) for the six sheet columns, computed column-wise.
+        Shift & batas merah (datang / balik istirahat) sudah dihitung di annotate_report.
+        """
+        n_rows = len(df)
+        slot_columns = ['Pagi', 'Siang_1', 'Siang_2', 'Sore']
+        slots = np.column_stack([
+            df[col].to_numpy(dtype=object) if col in df.columns else np.full(n_rows, '', dtype=object)
+            for col in slot_columns
+        ]) if n_rows else np.empty((0, 4), dtype=object)
+        
+        # Slot kosong -> Merah; Pagi telat datang / Siang_2 telat balik -> merah tebal
+        codes = np.where(slots.astype(bool), 0, 1).astype(np.int8)
+        late = np.zeros((n_rows, 4), dtype=bool)
+        late[:, 0] = df[AppConstants.COL_LATE_ARRIVAL].to_numpy(dtype=bool)
+        late[:, 2] = df[AppConstants.COL_LATE_RETURN].to_numpy(dtype=bool)
+        codes[late & (codes == 0)] = 3
+        
+        # LOGIC 1: Izin Manual -> Kuning
+        # LOGIC 2: Alpha (Kosong Semua) -> Kuning Full
+        full = df[AppConstants.COL_STATUS_CODE].isin(
+            [AttendanceStatus.PERMIT.name, AttendanceStatus.ABSENT.name]
+        ).to_numpy()
+        codes[full] = 2
+        slots[full] = ''
+        
+        format_codes = np.zeros((n_rows, 6), dtype=np.int8)
+        format_codes[:, 1:5] = codes
+        values = np.column_stack([
+            df[AppConstants.COL_EMPLOYEE_NAME].to_numpy(dtype=object),
+            slots,
+            df[AppConstants.COL_STATUS].to_numpy(dtype=object),
+        ]) if n_rows else np.empty((0, 6), dtype=object)
+        return values.tolist(), format_codes
+
+    def create_attendance_report(self, df: pd.DataFrame, date_obj: date, metrics: Any = None):
+        """Creates a single sheet report from a frame annotated by annotate_report"""
         output = io.BytesIO()
-        self.workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        self.workbook = xlsxwriter.Workbook(output, self.WORKBOOK_OPTIONS)
         self._init_formats(self.workbook)
         
         sheet_name = date_obj.strftime('%d-%b')
         ws = self.workbook.add_worksheet(sheet_name)
         
-        self._write_sheet_content(ws, df, status_dict, target_date=date_obj)
+        self._write_sheet_content(ws, df)
         
         self.workbook.close()
         output.seek(0)
         return output
 
-    def create_range_report(self, data_map: Dict[datetime.date, Tuple[pd.DataFrame, Dict]]):
-        """Creates a multi-sheet Excel report for a date range."""
-        output = io.BytesIO()
-        self.workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    def create_range_report(
+        self,
+        data_map: Dict[datetime.date, Tuple[pd.DataFrame, Dict]],
+        progress: Optional[Callable[[float], None]] = None
+    ):
+        """
+        Creates a multi-sheet Excel report for a date range.
+        Streams in constant-memory mode into a spooled temporary file (kept in
+        RAM up to EXPORT_SPOOL_MAX_BYTES, then on disk); ExportArtifact.from_output
+        takes the returned file over, so a large workbook stays on disk.
+        progress(fraction) is called after every sheet and may raise to abort.
+        """
+        output = tempfile.SpooledTemporaryFile(max_size=AppConstants.EXPORT_SPOOL_MAX_BYTES)
+        self.workbook = xlsxwriter.Workbook(output, self.STREAMING_OPTIONS)
         self._init_formats(self.workbook)
 
         sorted_dates = sorted(data_map.keys())
 
-        for date_obj in sorted_dates:
-            df, status_dict = data_map[date_obj]
-            sheet_name = date_obj.strftime('%d-%b') 
+        try:
+            for sheet_idx, date_obj in enumerate(sorted_dates, start=1):
+                df, _ = data_map[date_obj]
+                sheet_name = date_obj.strftime('%d-%b') 
+                ws = self.workbook.add_worksheet(sheet_name)
+                self._write_sheet_content(ws, df)
+                if progress is not None:
+                    progress(sheet_idx / len(sorted_dates))
+
+            self.workbook.close()
+        except BaseException:
+            output.close()  # Dibatalkan/gagal: buang file sementara
+            raise
+        output.seek(0)
+        return output
+
+    # Kode per sel di sheet tersembunyi -> warna lewat conditional_format
+    MATRIX_CODES = {'I': 'Izin', 'A': 'Alpha', 'T': 'Telat', 'K': 'Slot Kosong'}
+
+    def create_month_matrix_report(
+        self,
+        data_map: Dict[datetime.date, Tuple[pd.DataFrame, Dict]],
+        progress: Optional[Callable[[float], None]] = None
+    ):
+        """
+        Creates a compliance workbook with one sheet per month: employees as rows,
+        days as columns. Each cell shows the arrival time (or the permit text);
+        coloring comes from conditional_format rules that read a hidden code
+        sheet, so no cell carries its own color format.
+        Built from the same {date: (df_final, status_dict)} map as create_range_report;
+        progress(fraction) is called after every month.
+        """
+        output = io.BytesIO()
+        self.workbook = xlsxwriter.Workbook(output, self.WORKBOOK_OPTIONS)
+        self._init_formats(self.workbook)
+        cf_formats = {
+            'I': self.workbook.add_format({'bg_color': '#FFFF00'}),
+            'A': self.workbook.add_format({'bg_color': '#FFFF00'}),
+            'T': self.workbook.add_format({'font_color': 'red', 'bold': True}),
+            'K': self.workbook.add_format({'bg_color': '#FF0000'}),
+        }
+
+        months: Dict[Tuple[int, int], List[datetime.date]] = {}
+        for date_obj in sorted(data_map):
+            months.setdefault((date_obj.year, date_obj.month), []).append(date_obj)
+
+        for month_idx, days in enumerate(months.values()):
+            if progress is not None:
+                progress(month_idx / len(months))
+            display, codes, employees = self._month_matrices(data_map, days)
+            sheet_name = days[0].strftime('%b %Y')
+            code_sheet_name = f"Kode {sheet_name}"
             ws = self.workbook.add_worksheet(sheet_name)
-            self._write_sheet_content(ws, df, status_dict, target_date=date_obj)
+            ws_codes = self.workbook.add_worksheet(code_sheet_name)
+            ws_codes.hide()
+
+            n_rows, n_days = display.shape
+            summary_headers = [self.MATRIX_CODES[code] for code in self.MATRIX_CODES]
+            ws.write_row(0, 0, ['Nama Karyawan'] + [f"{d.day:02d}" for d in days] + summary_headers, self.fmt_head)
+            ws.set_column(0, 0, 30)
+            ws.set_column(1, n_days, 7)
+            ws.set_column(n_days + 1, n_days + len(summary_headers), 11)
+            ws.freeze_panes(1, 1)
+
+            # Satu write_row per karyawan; warna tidak ditulis per sel
+            day_range = xl_range(1, 1, 1, n_days) if n_rows else None
+            for row_idx in range(n_rows):
+                row_num = row_idx + 1
+                ws.write_row(row_num, 0, [employees[row_idx]] + display[row_idx].tolist(), self.fmt_norm)
+                ws_codes.write_row(row_num, 1, codes[row_idx].tolist())
+                code_range = f"'{code_sheet_name}'!{xl_range(row_num, 1, row_num, n_days)}"
+                for offset, code in enumerate(self.MATRIX_CODES):
+                    ws.write_formula(
+                        row_num, n_days + 1 + offset, f'=COUNTIF({code_range},"{code}")',
+                        self.fmt_norm, int((codes[row_idx] == code).sum())
+                    )
+
+            if n_rows:
+                top_left_code = f"'{code_sheet_name}'!{xl_rowcol_to_cell(1, 1, row_abs=False, col_abs=False)}"
+                for code, cf_format in cf_formats.items():
+                    ws.conditional_format(1, 1, n_rows, n_days, {
+                        'type': 'formula',
+                        'criteria': f'={top_left_code}="{code}"',
+                        'format': cf_format,
+                        'stop_if_true': True,
+                    })
+            ws.write(n_rows + 2, 0, "Kuning = Izin / Alpha · Merah = slot kosong · Merah tebal = telat")
 
         self.workbook.close()
+        if progress is not None:
+            progress(1.0)
         output.seek(0)
         return output
+
+    @staticmethod
+    def _month_matrices(
+        data_map: Dict[datetime.date, Tuple[pd.DataFrame, Dict]], days: List[datetime.date]
+    ) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Display and code matrices (employee x day) for the month sheet, column by column."""
+        employees = list(dict.fromkeys(
+            name for day in days for name in data_map[day][0][AppConstants.COL_EMPLOYEE_NAME]
+        ))
+        employee_index = pd.Index(employees)
+        display = np.full((len(employees), len(days)), '', dtype=object)
+        codes = np.full((len(employees), len(days)), '', dtype=object)
+        slot_columns = ['Pagi', 'Siang_1', 'Siang_2', 'Sore']
+
+        for day_idx, day in enumerate(days):
+            df = data_map[day][0]
+            if df.empty:
+                continue
+            rows = employee_index.get_indexer(df[AppConstants.COL_EMPLOYEE_NAME])
+            slots = np.column_stack([
+                df[col].to_numpy(dtype=object) if col in df.columns else np.full(len(df), '', dtype=object)
+                for col in slot_columns
+            ])
+            filled = slots.astype(bool)
+            # Jam datang; kalau Pagi kosong, log pertama yang ada
+            first_slot = np.where(filled.any(axis=1), filled.argmax(axis=1), 0)
+            shown = np.where(filled.any(axis=1), slots[np.arange(len(df)), first_slot], '')
+
+            status_code = df[AppConstants.COL_STATUS_CODE].to_numpy()
+            manual = df[AppConstants.COL_STATUS].to_numpy(dtype=object)
+            is_permit = status_code == AttendanceStatus.PERMIT.name
+            is_absent = status_code == AttendanceStatus.ABSENT.name
+            is_late = (
+                df[AppConstants.COL_LATE_ARRIVAL].to_numpy(dtype=bool)
+                | df[AppConstants.COL_LATE_RETURN].to_numpy(dtype=bool)
+            )
+            day_codes = np.select(
+                [is_permit, is_absent, is_late, ~filled.all(axis=1)], ['I', 'A', 'T', 'K'], default=''
+            )
+            shown = np.where(is_permit, manual, np.where(is_absent, 'A', shown))
+
+            display[rows, day_idx] = shown
+            codes[rows, day_idx] = day_codes
+        return display, codes, employees
+
 # ================================================================================
 # SECTION 5: UI STYLING LAYER
 # ================================================================================
@@ -1691,34 +3317,15 @@ class ComponentRenderer:
             div_color = "#666"
             div_icon = "❓"
         
-        # Determine status
-        manual_status = status_dict.get(name, "")
-        times = [morning, break_out, break_in, evening]
-        empty_count = sum(1 for t in times if t == '')
-        
-        if manual_status:
-            status = AttendanceStatus.PERMIT
-            status_text = f"PERMIT: {manual_status}"
-        elif empty_count == 4:
-            status = AttendanceStatus.ABSENT
-            status_text = status.display_text
-        elif empty_count > 0:
-            status = AttendanceStatus.PARTIAL_DUTY
-            status_text = status.display_text
+        # Status & telat sudah dihitung sekali di annotate_report
+        status = AttendanceStatus[employee_data[AppConstants.COL_STATUS_CODE]]
+        if status == AttendanceStatus.PERMIT:
+            status_text = f"PERMIT: {employee_data[AppConstants.COL_STATUS]}"
         else:
-            status = AttendanceStatus.FULL_DUTY
             status_text = status.display_text
         
-        # Check if late (UPDATED DUAL SHIFT)
-        # Check if late
-        is_late = False
-        shift_label = ""
-        
-        if morning:
-            # Panggil fungsi logic baru DENGAN NAME & EVENING
-            is_late_status, shift_name = self.time_service.is_late(morning, name, evening)
-            is_late = is_late_status
-            shift_label = shift_name
+        is_late = bool(morning) and bool(employee_data[AppConstants.COL_LATE_ARRIVAL])
+        shift_label = employee_data[AppConstants.COL_SHIFT]
 
         late_indicator = ""
         if is_late:
@@ -2141,13 +3748,14 @@ class AttendanceController:
     """
     
     def __init__(self):
-        # Initialize repositories
-        self.attendance_repo = AttendanceRepository(DataSourceConfig.ATTENDANCE_SHEET_URL)
-        self.status_repo = StatusRepository(DataSourceConfig.STATUS_SHEET_URL)
+        # Data layer bersama (satu per proses, di-refresh di background)
+        self.data_service = get_data_service()
+        self.attendance_repo = self.data_service.attendance_repo
+        self.status_repo = self.data_service.status_repo
         
         # Initialize services
-        self.attendance_service = AttendanceService(self.attendance_repo, self.status_repo)
-        self.analytics_service = AnalyticsService(self.attendance_repo)
+        self.attendance_service = AttendanceService(self.attendance_repo, self.status_repo, self.data_service)
+        self.analytics_service = AnalyticsService(self.attendance_repo, self.data_service)
         
         # Initialize UI components
         self.component_renderer = ComponentRenderer()
@@ -2162,8 +3770,10 @@ class AttendanceController:
                     unsafe_allow_html=True)
         
         # 2. Check data availability
-        df_attendance = self.attendance_repo.fetch()
-        if df_attendance is None:
+        attendance_index = self.data_service.attendance_index()
+        if attendance_index is None:
+            if self.attendance_repo.last_error:
+                st.error(self.attendance_repo.last_error)
             st.error("⚠️ SYSTEM OFFLINE - Unable to connect to attendance database")
             st.stop()
         
@@ -2171,14 +3781,8 @@ class AttendanceController:
         col1, col2, col3 = st.columns([2, 3, 2])
         
         with col1:
-            # Ambil data unik dulu
-            unfiltered_dates = df_attendance['Tanggal'].unique()
-            
-            # Filter manual: hanya ambil data yang BUKAN NaT
-            clean_dates = [d for d in unfiltered_dates if pd.notna(d)]
-            
-            # Baru di-sort
-            available_dates = sorted(clean_dates, reverse=True)
+            # Tanggal unik sudah tersedia (urut) dari partition index, NaT sudah dibuang di transform
+            available_dates = attendance_index.dates[::-1]
 
             # PERBAIKAN: Geser 'if' ke KIRI agar lurus dengan 'available_dates' di atasnya
             if not available_dates:
@@ -2234,13 +3838,24 @@ class AttendanceController:
             with col_ex1:
                 st.info(f"Download report for selected date: **{selected_date.strftime('%d %B %Y')}**")
                 
-                excel_file = self.excel_exporter.create_attendance_report(
-                    df_final, status_dict, selected_date, metrics
+                # Workbook baru dibuat saat tombol diklik (bukan tiap rerun / ketikan search),
+                # laporan dengan isi yang sama diambil dari ExportCache
+                daily_key = ExportCache.key(
+                    'daily', selected_date, ExcelExporter.VERSION, df_final, sorted(status_dict.items())
                 )
                 
+                def build_daily_excel() -> Optional[bytes]:
+                    artifact = self.data_service.export_cache.get_or_build(
+                        daily_key,
+                        lambda: self.excel_exporter.create_attendance_report(
+                            df_final, selected_date, metrics
+                        )
+                    )
+                    return artifact.read() if artifact is not None else None
+                
                 st.download_button(
                     "📥 DOWNLOAD DAILY EXCEL",
-                    data=excel_file,
+                    data=build_daily_excel,
                     file_name=f"Attendance_{selected_date.strftime('%Y%m%d')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     use_container_width=True
@@ -2259,38 +3874,67 @@ class AttendanceController:
                 start_date_input = st.date_input("Start Date", value=selected_date - timedelta(days=7))
             with col_rng2:
                 end_date_input = st.date_input("End Date", value=selected_date)
+            range_layout = st.radio(
+                "Layout",
+                ["Daily Sheets", "Month Matrix"],
+                horizontal=True,
+                help="Month Matrix: satu sheet per bulan, karyawan x tanggal"
+            )
 
-            # Tombol Generate
+            # Tombol Generate -> job background; halaman tetap bisa dipakai selama export jalan
+            export_jobs = self.data_service.export_jobs
+            export_owner = ConfigurationManager.export_owner()
             if st.button("📦 GENERATE RANGE REPORT", use_container_width=True):
+                # Snapshot dikunci saat submit: kunci cache dan isi workbook berasal dari
+                # data yang sama walau ada refresh sebelum worker mulai
+                data_service = self.data_service
+                snapshot = data_service.snapshot()
                 if start_date_input > end_date_input:
                     st.error("Error: Start Date must be before End Date")
+                elif snapshot is None:
+                    st.error("❌ Data belum tersedia, coba lagi sebentar.")
                 else:
-                    with st.spinner(f"Generating report from {start_date_input} to {end_date_input}..."):
-                        range_data_map = {}
-                        current_loop_date = start_date_input
-                        
-                        # Loop untuk mengambil data setiap hari dalam range
-                        while current_loop_date <= end_date_input:
-                            try:
-                                # Kita panggil service ulang untuk setiap tanggal
-                                day_df, day_status = self.attendance_service.build_complete_report(current_loop_date)
-                                range_data_map[current_loop_date] = (day_df, day_status)
-                            except Exception:
-                                pass # Skip error dates
-                            current_loop_date += timedelta(days=1)
-                        
-                        if range_data_map:
-                            range_excel = self.excel_exporter.create_range_report(range_data_map)
-                            st.success("✅ Report Generated Successfully!")
-                            st.download_button(
-                                label=f"📥 DOWNLOAD RANGE REPORT ({start_date_input} - {end_date_input})",
-                                data=range_excel,
-                                file_name=f"Attendance_Range_{start_date_input}_{end_date_input}.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                use_container_width=True
-                            )
-                        else:
-                            st.warning("No data found for the selected range.")
+                    # Semua hari dalam range dibangun sekali jalan. Kunci cache memakai versi
+                    # terakhir yang mengubah absensi di range ini (change feed) + isi status
+                    # range, jadi refresh yang hanya menyentuh tanggal lain tetap kena cache
+                    range_key = ExportCache.key(
+                        'range', range_layout,
+                        data_service.range_version(start_date_input, end_date_input, snapshot.version),
+                        sorted((day, sorted(statuses.items())) for day, statuses in
+                               self.attendance_service.get_status_for_range(
+                                   start_date_input, end_date_input, snapshot).items()),
+                        ShiftRuleTable.version, start_date_input, end_date_input, ExcelExporter.VERSION
+                    )
+                    attendance_service = self.attendance_service
+                    
+                    def build_range_excel(progress: Callable[[float], None]) -> Optional[io.IOBase]:
+                        progress(0.0)
+                        range_data_map = attendance_service.build_range_report(
+                            start_date_input, end_date_input, snapshot
+                        )
+                        if not range_data_map:
+                            return None
+                        progress(0.1)
+                        # Exporter baru per job: formats & workbook adalah state instance
+                        exporter = ExcelExporter()
+                        sheet_progress = lambda fraction: progress(0.1 + 0.9 * fraction)
+                        if range_layout == "Month Matrix":
+                            return exporter.create_month_matrix_report(range_data_map, sheet_progress)
+                        return exporter.create_range_report(range_data_map, sheet_progress)
+                    
+                    job = export_jobs.submit(
+                        owner=export_owner,
+                        label=f"{range_layout} {start_date_input} → {end_date_input}",
+                        file_name=(
+                            f"Attendance_{'Matrix' if range_layout == 'Month Matrix' else 'Range'}"
+                            f"_{start_date_input}_{end_date_input}.xlsx"
+                        ),
+                        cache_key=range_key,
+                        build=build_range_excel,
+                    )
+                    st.toast(f"Export #{job.job_id} queued")
+            
+            self._render_export_jobs(export_jobs, export_owner)
 
         st.markdown("---")
         
@@ -2317,14 +3961,12 @@ class AttendanceController:
         # Prepare display dataframe
         df_display = df.copy()
         
-        df_display['Division'] = df_display[AppConstants.COL_EMPLOYEE_NAME].apply(
-            lambda x: DivisionRegistry.find_by_member(x).code 
-            if DivisionRegistry.find_by_member(x) else "N/A"
-        )
+        df_display['Division'] = DivisionRegistry.divisions_for(
+            df_display[AppConstants.COL_EMPLOYEE_NAME]
+        ).fillna("N/A")
         
-        df_display['Status'] = df_display[AppConstants.COL_EMPLOYEE_NAME].apply(
-            lambda x: status_dict.get(x, "")
-        )
+        df_display['Status'] = df_display[AppConstants.COL_STATUS]
+        late_mask = df_display[AppConstants.COL_LATE_ARRIVAL].to_numpy(dtype=bool)
         
         # Rename columns for display
         df_display = df_display.rename(columns={
@@ -2348,18 +3990,13 @@ class AttendanceController:
         final_cols = [c for c in display_columns if c in df_display.columns]
         df_display = df_display[final_cols]
         
-        # Styling Function (FIXED)
-        def highlight_late(val):
-            if isinstance(val, str) and ':' in val:
-                # Bongkar paket tuple, ambil status (index 0)
-                is_late_status, _ = TimeService.is_late(val)
-                if is_late_status:
-                    return 'color: #e84118; font-weight: bold'
-            return ''
+        # Styling Function: baca kolom telat hasil annotate_report
+        def highlight_late(col: pd.Series) -> np.ndarray:
+            return np.where(late_mask, 'color: #e84118; font-weight: bold', '')
         
         try:
             st.dataframe(
-                df_display.style.applymap(highlight_late, subset=['Jam Datang']),
+                df_display.style.apply(highlight_late, subset=['Jam Datang']),
                 use_container_width=True,
                 height=600,
                 hide_index=True
@@ -2377,6 +4014,48 @@ class AttendanceController:
             use_container_width=True
         )
 
+    def _render_export_jobs(self, export_jobs: ExportJobQueue, owner: str) -> None:
+        """This owner's recent background exports; the panel refreshes itself while any job runs."""
+        polling = any(job.active for job in export_jobs.jobs(owner))
+        
+        @st.fragment(run_every=1.0 if polling else None)
+        def export_jobs_panel() -> None:
+            jobs = export_jobs.jobs(owner)
+            if not jobs:
+                return
+            st.markdown("#### 🗂️ EXPORT JOBS")
+            for job in jobs:
+                col_info, col_action = st.columns([4, 1])
+                with col_info:
+                    st.caption(f"#{job.job_id} · {job.label} · {job.created_at.strftime('%H:%M:%S')}")
+                    if job.active:
+                        st.progress(job.progress, text=f"{job.status.title()} {job.progress:.0%}")
+                    elif job.status == "done":
+                        st.caption("✅ Ready")
+                    elif job.status == "failed":
+                        st.caption(job.error or "❌ Failed")
+                    else:
+                        st.caption("⏹️ Cancelled")
+                with col_action:
+                    if job.active:
+                        if st.button("✖ Cancel", key=f"cancel_export_{job.job_id}", use_container_width=True):
+                            export_jobs.cancel(job.job_id, owner)
+                            st.rerun(scope="fragment")
+                    elif job.status == "done":
+                        # Dibaca saat tombol diklik: workbook besar tetap di file sementara sampai itu
+                        st.download_button(
+                            "📥 Download",
+                            data=job.artifact.read,
+                            file_name=job.file_name,
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            key=f"download_export_{job.job_id}",
+                            use_container_width=True
+                        )
+            if polling and not any(job.active for job in jobs):
+                st.rerun()  # Semua job selesai: rerun penuh sekali untuk berhenti polling
+        
+        export_jobs_panel()
+
     def _render_analytics_view(
         self, 
         df: pd.DataFrame, 
@@ -2402,7 +4081,9 @@ class AttendanceController:
         # Charts row 2
         df_attendance_day = self.attendance_service.get_attendance_for_date(selected_date)
         if df_attendance_day is not None and not df_attendance_day.empty:
-            time_dist_chart = self.chart_builder.create_time_distribution_chart(df_attendance_day)
+            time_dist_chart = self.chart_builder.create_time_distribution_chart(
+                AttendanceSchema.expand(df_attendance_day, ['Jam'])
+            )
             st.plotly_chart(time_dist_chart, use_container_width=True)
         
         # Key insights
@@ -2564,44 +4245,41 @@ class PerformanceMonitor:
     def __init__(self):
         self.start_time = None
         self.metrics = {}
+        # Dipakai bersama refresher & thread UI: entri diganti utuh di bawah lock
+        self._lock = threading.Lock()
     
     def start_timer(self, operation: str) -> None:
-        """Start timing an operation."""
-        self.start_time = datetime.now()
-        self.metrics[operation] = {'start': self.start_time}
+        """Start timing an operation (its last finished duration stays in the summary)."""
+        with self._lock:
+            self.start_time = datetime.now()
+            self.metrics[operation] = {**self.metrics.get(operation, {}), 'start': self.start_time}
     
     def end_timer(self, operation: str) -> float:
         """End timing and return duration in seconds."""
-        if operation not in self.metrics:
-            return 0.0
-        
-        end_time = datetime.now()
-        duration = (end_time - self.metrics[operation]['start']).total_seconds()
-        self.metrics[operation]['duration'] = duration
+        with self._lock:
+            if operation not in self.metrics:
+                return 0.0
+            
+            end_time = datetime.now()
+            duration = (end_time - self.metrics[operation]['start']).total_seconds()
+            self.metrics[operation] = {**self.metrics[operation], 'duration': duration}
         
         return duration
     
     def get_summary(self) -> Dict[str, float]:
-        """Get performance summary."""
-        return {
-            op: data.get('duration', 0.0) 
-            for op, data in self.metrics.items()
-        }
+        """Get performance summary (last finished duration per operation)."""
+        with self._lock:
+            return {
+                op: data.get('duration', 0.0) 
+                for op, data in self.metrics.items()
+            }
     
     @staticmethod
-    def optimize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-        """Optimize DataFrame memory usage."""
-        for col in df.columns:
-            col_type = df[col].dtype
-            
-            if col_type == 'object':
-                df[col] = df[col].astype('category')
-            elif col_type == 'float64':
-                df[col] = df[col].astype('float32')
-            elif col_type == 'int64':
-                df[col] = df[col].astype('int32')
-        
-        return df
+    def memory_usage(df: Optional[pd.DataFrame]) -> int:
+        """Deep memory footprint of a DataFrame in bytes (object strings included)."""
+        if df is None:
+            return 0
+        return int(df.memory_usage(deep=True).sum())
 
 
 class BackupManager:
@@ -2840,6 +4518,21 @@ class ConfigurationManager:
         if 'notifications_enabled' not in st.session_state:
             st.session_state['notifications_enabled'] = True
     
+    @staticmethod
+    def export_owner() -> str:
+        """
+        Owner token of this browser tab's export jobs. Kept in the URL query
+        (AppConstants.EXPORT_OWNER_PARAM) so it survives a page refresh; a new
+        tab without it gets a fresh random token and sees none of the others' jobs.
+        """
+        token = st.session_state.get('export_owner') or st.query_params.get(AppConstants.EXPORT_OWNER_PARAM)
+        if not token:
+            token = secrets.token_urlsafe(16)
+        st.session_state['export_owner'] = token
+        if st.query_params.get(AppConstants.EXPORT_OWNER_PARAM) != token:
+            st.query_params[AppConstants.EXPORT_OWNER_PARAM] = token
+        return token
+    
     @staticmethod
     def get_user_preferences() -> Dict[str, Any]:
         """Get user preferences from session state."""
@@ -2911,7 +4604,7 @@ def render_sidebar() -> str:
         st.markdown("### ⚡ QUICK ACTIONS")
         
         if st.button("🔄 Refresh Data", use_container_width=True):
-            st.cache_data.clear()
+            get_data_service().refresh()
             st.rerun()
         
         if st.button("📥 Bulk Export", use_container_width=True):
@@ -2921,9 +4614,44 @@ def render_sidebar() -> str:
         
         # System info
         st.markdown("### 📡 SYSTEM STATUS")
-        st.success("🟢 Online")
+        health = get_data_service().health()
+        last_sync = health['last_success'].strftime('%H:%M:%S') if health['last_success'] else "—"
+        if health['loading']:
+            st.info("🔵 Loading data…")
+        elif not health['loaded']:
+            st.error("🔴 Offline")
+        elif health['stale']:
+            age = f"{int(health['age_seconds'])}s ago" if health['age_seconds'] is not None else "offline snapshot"
+            st.warning(f"🟠 Stale data ({age})")
+            for error in health['errors']:
+                st.caption(error)
+        else:
+            st.success("🟢 Online")
         st.caption(f"Version: {AppConstants.APP_VERSION}")
-        st.caption(f"Last Updated: {datetime.now().strftime('%H:%M:%S')}")
+        data_version = "loading" if health['loading'] else f"v{health['version']}"
+        st.caption(f"Last Updated: {last_sync} · data {data_version}")
+        timings = health['fetch_seconds']
+        if 'fetch_total' in timings:
+            st.caption(
+                f"Fetch: {timings['fetch_total']:.2f}s "
+                f"(attendance {timings.get('fetch_attendance', 0.0):.2f}s · status {timings.get('fetch_status', 0.0):.2f}s)"
+            )
+        memory = health['memory']
+        if memory:
+            st.caption(
+                f"Memory: CSV pivot {memory['raw_pivot_bytes'] / 2**20:.1f} MB · "
+                f"flat table {memory['rows']:,} punches {memory['flat_bytes'] / 2**20:.1f} MB"
+            )
+        unmatched = health['unmatched_names']
+        if not unmatched.empty:
+            with st.expander(f"⚠️ {len(unmatched)} nama mesin tidak dikenal"):
+                st.caption("Log nama ini dibuang. Tambahkan ke divisi atau NameCanonicalizer.ALIASES.")
+                st.dataframe(unmatched, hide_index=True, use_container_width=True)
+        fuzzy = health['fuzzy_names']
+        if not fuzzy.empty:
+            with st.expander(f"🔀 {len(fuzzy)} nama mesin dipetakan otomatis"):
+                st.caption("Log nama ini dipindah ke nama terdekat di registry. Periksa, lalu tambahkan ke NameCanonicalizer.ALIASES.")
+                st.dataframe(fuzzy, hide_index=True, use_container_width=True)
         
         # Footer
         st.markdown("---")